@@ -1,17 +1,19 @@
+import logging
+import os
 import streamlit as st
 import pandas as pd
 import warnings
-import io
-import zipfile
-import json
 
 # Importações dos módulos locais
-from components.sidebar import render_sidebar
+from components.sidebar import render_sidebar, render_performance_panel, render_profile_report
 from components.metrics import render_current_rates, render_metrics_cards, render_comparative_table
-from components.charts import render_temporal_chart, render_correlation_heatmap
+from components.charts import render_temporal_chart, render_rolling_analytics, render_correlation_heatmap, render_cross_rates, render_candlestick
 from components.analysis import render_advanced_analysis
-from services.api_client import get_exchange_data
+from services.api_client import get_exchange_data, get_history_refreshed_at, get_rolling_analytics, get_rollups, period_resolution, rollup_closes, get_metrics, ROLLING_WINDOWS
+from utils import perf
+from utils.profiler import PROFILE_ENV, PROFILE_PARAM, profile_mode, start_profiler
 from utils.helpers import calculate_metrics
+from utils.export import EXPORT_FORMATS, export_key, get_export
 
 # Configuração da Página
 st.set_page_config(
@@ -24,6 +26,8 @@ st.set_page_config(
 # Suprimir avisos desnecessários do Pandas
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 # --- Função para Carregar CSS ---
 def local_css(file_name):
     """Carrega o arquivo CSS local para estilizar o dashboard"""
@@ -34,25 +38,83 @@ def local_css(file_name):
         st.warning(f"Arquivo de estilo não encontrado: {file_name}. Verifique se 'styles.css' está na raiz.")
 
 # --- Função para Exportação ---
+@st.fragment
 def export_zip(df_data, metrics_data):
-    """Cria um ZIP com histórico (CSV) e métricas (JSON) para download"""
-    buffer = io.BytesIO()
-    with zipfile.ZipFile(buffer, "w") as zip_file:
-        # Salva o CSV
-        zip_file.writestr("historico_cotacoes.csv", df_data.to_csv(index=False))
-        # Salva o JSON com caracteres especiais (UTF-8)
-        zip_file.writestr("metricas_analise.json", json.dumps(metrics_data, indent=4, ensure_ascii=False))
+    """
+    Exportação sob demanda (fragmento isolado): o arquivo só é gerado ao
+    clicar em "Preparar" e fica em cache pelo fingerprint dos dados.
+    """
+    label = st.selectbox("Formato:", options=list(EXPORT_FORMATS), key="export_format")
+    fmt, mime = EXPORT_FORMATS[label]
+    key = export_key(fmt, df_data, metrics_data)
+
+    if st.button("⚙️ Preparar Exportação", use_container_width=True):
+        st.session_state["export_ready"] = key
+
+    if st.session_state.get("export_ready") != key:
+        return
+
+    with st.spinner("Gerando arquivo..."):
+        data = get_export(fmt, df_data, metrics_data)
 
     st.download_button(
-        label="📦 Baixar Pacote de Dados (ZIP)",
-        data=buffer.getvalue(),
-        file_name="dashboard_cambial.zip",
-        mime="application/zip",
+        label=f"📦 Baixar Pacote de Dados ({label})",
+        data=data,
+        file_name=f"dashboard_cambial.{fmt}",
+        mime=mime,
         use_container_width=True
     )
 
+# --- Perfil sob demanda ---
+def requested_profile():
+    """
+    Modo do perfil pedido para esta execução (None = desligado). ?profile=<modo>
+    perfila só a execução atual; DASHBOARD_PROFILE=<modo>, a primeira de cada sessão.
+    """
+    mode = profile_mode(st.query_params.get(PROFILE_PARAM))
+    if mode is not None:
+        del st.query_params[PROFILE_PARAM]
+        return mode
+
+    mode = profile_mode(os.environ.get(PROFILE_ENV))
+    if mode is not None and not st.session_state.get("profiled"):
+        st.session_state["profiled"] = True
+        return mode
+    return None
+
 # --- Função Principal ---
 def main():
+    mode = requested_profile()
+    profiler = start_profiler(mode) if mode is not None else None
+
+    perf.start_run()
+    try:
+        with perf.stage("main"):
+            render_dashboard()
+    finally:
+        if profiler is not None:
+            # o resumo fica na sessão até o próximo perfil
+            try:
+                st.session_state["profile_report"] = profiler.stop()
+            except OSError:
+                st.session_state.pop("profile_report", None)
+                logger.warning("Não foi possível gravar o perfil em %s", profiler.directory, exc_info=True)
+
+        # também quando render_dashboard sai cedo (sem moedas, sem dados) ou falha:
+        # o painel mostra as etapas que chegaram a rodar. Não usar st.stop() lá dentro,
+        # pois a parada pendente interromperia este bloco no primeiro comando do Streamlit.
+        run = perf.end_run()
+        metrics = get_metrics()
+        render_performance_panel(run, metrics)
+        if st.session_state.get("profile_report"):
+            render_profile_report(st.session_state["profile_report"])
+        try:
+            perf.write_snapshot(metrics)
+        except OSError:
+            logger.warning("Não foi possível gravar as métricas em %s", perf.METRICS_DIR, exc_info=True)
+
+
+def render_dashboard():
     # 1. Carregar Estilos
     local_css("styles.css")
     
@@ -60,57 +122,90 @@ def main():
 
     try:
         # 2. Renderizar Sidebar e obter filtros
-        selected_currencies, time_period = render_sidebar()
+        with perf.stage("sidebar"):
+            selected_currencies, time_period = render_sidebar()
         
         if not selected_currencies:
             st.warning("⚠️ Selecione pelo menos uma moeda na barra lateral para iniciar a análise.")
-            st.stop()
+            return
 
         # 3. Carregar Dados da API
-        with st.spinner("🔄 Conectando à API e processando dados..."):
+        with st.spinner("🔄 Conectando à API e processando dados..."), perf.stage("exchange_data"):
             df_data = get_exchange_data(selected_currencies, time_period)
 
         if df_data.empty:
             st.error("❌ Não foi possível carregar os dados. Verifique sua conexão com a internet ou a disponibilidade da AwesomeAPI.")
-            st.stop()
+            return
 
         # 4. Exibir Cotações Atuais
-        render_current_rates(selected_currencies)
+        with perf.stage("current_rates"):
+            render_current_rates(selected_currencies)
 
         # 5. Calcular Métricas
-        metrics_data = calculate_metrics(df_data, selected_currencies)
+        with perf.stage("metrics"):
+            metrics_data = calculate_metrics(df_data, selected_currencies)
         if not metrics_data:
             st.error("❌ Erro ao calcular métricas financeiras.")
-            st.stop()
+            return
 
         # 6. Renderizar Componentes Visuais
         st.markdown("---")
-        render_metrics_cards(metrics_data, selected_currencies)
+        with perf.stage("metrics_cards"):
+            render_metrics_cards(metrics_data, selected_currencies)
         
-        render_temporal_chart(df_data, selected_currencies)
+        # períodos longos: o gráfico usa os agregados semanais/mensais em vez dos pontos diários
+        with perf.stage("temporal_chart"):
+            resolution, chart_data = period_resolution(time_period), df_data
+            if resolution != "D":
+                resolution, rollups = get_rollups(selected_currencies, time_period)
+                chart_data = rollup_closes(rollups) if rollups else df_data
+            render_temporal_chart(chart_data, selected_currencies, resolution=resolution)
+
+        if st.session_state.get("candlestick_view"):
+            with perf.stage("candlestick"):
+                render_candlestick(selected_currencies, time_period)
+
+        with perf.stage("rolling_analytics"):
+            rolling_data = get_rolling_analytics(selected_currencies, time_period)
+            render_rolling_analytics(rolling_data, ROLLING_WINDOWS)
         
         # Seção de Análise Avançada
-        render_advanced_analysis(metrics_data, df_data, selected_currencies)
+        with perf.stage("advanced_analysis"):
+            render_advanced_analysis(metrics_data, df_data, selected_currencies)
         
         # Tabela Comparativa
-        render_comparative_table(metrics_data, selected_currencies)
+        with perf.stage("comparative_table"):
+            render_comparative_table(metrics_data, selected_currencies)
 
         # Heatmap (apenas se houver mais de 1 moeda)
         if len(selected_currencies) > 1:
-            render_correlation_heatmap(df_data, selected_currencies)
+            with perf.stage("correlation_heatmap"):
+                render_correlation_heatmap(selected_currencies, time_period)
+
+        # Taxas cruzadas (matriz atual e histórico do par escolhido)
+        with perf.stage("cross_rates"):
+            render_cross_rates(selected_currencies, time_period)
 
         # 7. Área de Download
         st.markdown("---")
         st.subheader("💾 Exportar Dados")
         col_export, _ = st.columns([1, 2])
-        with col_export:
+        with col_export, perf.stage("export"):
             export_zip(df_data, metrics_data)
         
         st.caption("Nota: Os dados são fornecidos pela AwesomeAPI e podem apresentar atrasos em relação ao mercado oficial.")
 
+        refreshed_at = get_history_refreshed_at(selected_currencies)
+        if refreshed_at is not None:
+            st.caption(f"🕒 Histórico atualizado em {refreshed_at:%d/%m/%Y %H:%M:%S} (atualização automática em segundo plano)")
+
     except Exception as e:
+        # registra o traceback (log + métricas) em vez de só exibir a mensagem
+        logger.exception("Erro inesperado ao renderizar o dashboard")
+        perf.error("dashboard")
         st.error(f"❌ Ocorreu um erro inesperado: {str(e)}")
-        # Em produção, você pode adicionar logs aqui
+        with st.expander("Detalhes do erro"):
+            st.exception(e)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Benchmark do alinhamento de séries (combine_series).
+
+Compara a implementação antiga (concat + merge por moeda) com o bloco
+vetorizado atual para 5, 20 e 100 séries com 10 anos de dados diários.
+
+Uso: python benchmarks/bench_combine_series.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_client import combine_series  # noqa: E402
+
+YEARS = 10
+SERIES_COUNTS = [5, 20, 100]
+
+
+def legacy_combine_series(data_dict):
+    """Implementação anterior, mantida aqui apenas para comparação"""
+    all_dates = None
+    for df in data_dict.values():
+        if all_dates is None:
+            all_dates = df["date"]
+        else:
+            all_dates = pd.concat([all_dates, df["date"]])
+
+    all_dates = pd.DataFrame({"date": pd.to_datetime(all_dates.unique())})
+    all_dates = all_dates.sort_values("date")
+
+    df_final = all_dates.copy()
+    for currency, df in data_dict.items():
+        df_final = df_final.merge(df, on="date", how="left")
+
+    return df_final.ffill().bfill()
+
+
+def make_series(n_series, years=YEARS, seed=42):
+    """Gera séries diárias com buracos aleatórios (feriados/finais de semana)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2015-01-01", periods=365 * years, freq="D")
+    data = {}
+    for i in range(n_series):
+        keep = rng.random(len(dates)) > 0.3
+        values = 5 + np.cumsum(rng.normal(0, 0.01, keep.sum()))
+        name = f"C{i:03d}"
+        data[name] = pd.DataFrame({"date": dates[keep], name: values})
+    return data
+
+
+def timeit(func, data, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'séries':>8} {'antigo (ms)':>12} {'vetorizado (ms)':>16} {'ganho':>8}")
+    for n in SERIES_COUNTS:
+        data = make_series(n)
+        pd.testing.assert_frame_equal(combine_series(data), legacy_combine_series(data))
+        old = timeit(legacy_combine_series, data)
+        new = timeit(combine_series, data)
+        print(f"{n:>8} {old * 1000:>12.1f} {new * 1000:>16.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
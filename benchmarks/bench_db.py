@@ -0,0 +1,65 @@
+"""
+Benchmark da camada DB (SQLite).
+
+Mede a ingestão em lote de 1M de registros (10 moedas x 100k dias)
+e a latência de consultas por intervalo de datas.
+
+Uso: python benchmarks/bench_db.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from database.db import DB  # noqa: E402
+
+CURRENCIES = ["AUD", "CAD", "CHF", "DKK", "EUR", "GBP", "JPY", "NOK", "SEK", "USD"]
+ROWS_PER_CURRENCY = 100_000
+QUERIES = 200
+
+
+def make_frame(currency, rows, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "currency": currency,
+        "date": pd.date_range("1750-01-01", periods=rows, freq="D"),
+        "value": 5 + np.cumsum(rng.normal(0, 0.01, rows)),
+    })
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB(filepath=os.path.join(tmp, "bench.db"))
+
+        frames = [make_frame(c, ROWS_PER_CURRENCY, i) for i, c in enumerate(CURRENCIES)]
+        start = time.perf_counter()
+        for df in frames:
+            db.insert_many(df)
+        ingest = time.perf_counter() - start
+        total = db.count()
+        print(f"Ingestão: {total:,} registros em {ingest:.2f}s ({total / ingest:,.0f} registros/s)")
+
+        rng = np.random.default_rng(0)
+        dates = frames[0]["date"]
+        for window in (30, 365, 3650):
+            latencies = []
+            for _ in range(QUERIES):
+                currency = CURRENCIES[rng.integers(len(CURRENCIES))]
+                i = rng.integers(0, len(dates) - window)
+                start = time.perf_counter()
+                db.read_range(currency, dates.iloc[i], dates.iloc[i + window - 1])
+                latencies.append(time.perf_counter() - start)
+            latencies = np.array(latencies) * 1000
+            print(f"Consulta {window:>5} dias: p50 {np.percentile(latencies, 50):.2f} ms | p95 {np.percentile(latencies, 95):.2f} ms")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark da exportação de dados.
+
+Compara o ZIP antigo (CSV inteiro como string) com o ZIP gravado em
+blocos, Parquet e Arrow: tempo de geração, tamanho do arquivo e tempo
+de uma segunda exportação dos mesmos dados (cache por fingerprint).
+
+Uso: python benchmarks/bench_export.py
+"""
+
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.export import export_memo, get_export  # noqa: E402
+
+ROWS = [180, 10 * 365, 100_000]
+CURRENCIES = 10
+
+
+def legacy_export_zip(df_data, metrics_data):
+    """Implementação anterior, mantida aqui apenas para comparação"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("historico_cotacoes.csv", df_data.to_csv(index=False))
+        zip_file.writestr("metricas_analise.json", json.dumps(metrics_data, indent=4, ensure_ascii=False))
+    return buffer.getvalue()
+
+
+def make_frame(rows, n_currencies=CURRENCIES, seed=7):
+    rng = np.random.default_rng(seed)
+    data = 5 + np.cumsum(rng.normal(0, 0.01, (rows, n_currencies)), axis=0)
+    df = pd.DataFrame(data, columns=[f"C{i:02d}" for i in range(n_currencies)])
+    df.insert(0, "date", pd.date_range("2000-01-01", periods=rows, freq="h"))
+    return df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    metrics = {"C00": {"current_value": 5.0, "volatility": 12.3}}
+    print(f"{'linhas':>8} {'formato':>14} {'tempo (ms)':>11} {'tamanho (KB)':>13} {'cache (ms)':>11}")
+    for rows in ROWS:
+        df = make_frame(rows)
+        export_memo.clear()
+
+        data, elapsed = timed(legacy_export_zip, df, metrics)
+        print(f"{rows:>8} {'zip (antigo)':>14} {elapsed * 1000:>11.1f} {len(data) / 1024:>13.1f} {'-':>11}")
+
+        for fmt in ("zip", "parquet", "arrow"):
+            data, elapsed = timed(get_export, fmt, df, metrics)
+            _, cached = timed(get_export, fmt, df, metrics)
+            print(f"{rows:>8} {fmt:>14} {elapsed * 1000:>11.1f} {len(data) / 1024:>13.1f} {cached * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark de memória por sessão do bloco alinhado (get_exchange_data).
+
+Simula N sessões abertas, cada uma guardando o DataFrame devolvido por
+get_exchange_data, e compara:
+  - antes:  formato largo (coluna "date" + float64, BRL materializado),
+            um DataFrame novo por sessão;
+  - depois: formato compacto (DatetimeIndex + float32, BRL virtual),
+            visões somente leitura do mesmo bloco compartilhado.
+
+A memória é medida com tracemalloc (alocações vivas após as N sessões).
+Para não depender da rede, as respostas da AwesomeAPI são sintéticas.
+
+Uso: python benchmarks/bench_memory.py
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import services.api_client as api_client  # noqa: E402
+from bench_reruns import OfflineSession  # noqa: E402
+from utils.frames import frame_nbytes  # noqa: E402
+
+SESSIONS = [1, 10, 50]
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "BRL"]
+PERIOD = "6 meses"
+
+
+def held_bytes(sessions, compact):
+    """Bytes vivos após `sessions` sessões guardarem o resultado de get_exchange_data"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = [api_client.get_exchange_data(CURRENCIES, PERIOD, compact=compact) for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return used, held[0]
+
+
+def main():
+    session = OfflineSession()
+    api_client.get_session = lambda: session
+    state_dir = tempfile.mkdtemp()
+    api_client.HISTORY_DB_PATH = os.path.join(state_dir, "history.db")
+
+    # aquece os históricos e o bloco compacto compartilhado
+    api_client.get_exchange_data(CURRENCIES, PERIOD, compact=False)
+    api_client.get_exchange_data(CURRENCIES, PERIOD, compact=True)
+    shared = api_client.get_aligned_frame(CURRENCIES)
+
+    print(f"{len(CURRENCIES)} moedas, período {PERIOD}; bloco compartilhado: {frame_nbytes(shared) / 1024:.1f} KB")
+    print(f"{'sessões':>8} {'largo (KB/sessão)':>18} {'compacto (KB/sessão)':>21}")
+    for n in SESSIONS:
+        wide_bytes, wide = held_bytes(n, compact=False)
+        compact_bytes, compact = held_bytes(n, compact=True)
+        print(f"{n:>8} {wide_bytes / n / 1024:>18.2f} {compact_bytes / n / 1024:>21.2f}")
+
+    print(f"DataFrame por sessão: largo {frame_nbytes(wide) / 1024:.1f} KB, compacto {frame_nbytes(compact) / 1024:.1f} KB (visão do bloco)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark do cálculo de métricas (calculate_metrics).
+
+Compara o laço antigo (uma moeda por vez, com os helpers individuais,
+reproduzidos aqui só como referência) com o cálculo matricial atual,
+para 10, 100 e 500 moedas.
+
+Uso: python benchmarks/bench_metrics.py
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.helpers import calculate_metrics  # noqa: E402
+
+ROWS = 180
+CURRENCY_COUNTS = [10, 100, 500]
+
+
+def legacy_percentage_change(values, days):
+    if len(values) <= days:
+        return 0.0
+    past = values.iloc[-(days + 1)]
+    current = values.iloc[-1]
+    return float(((current - past) / past) * 100)
+
+
+def legacy_volatility(values):
+    returns = values.pct_change().dropna()
+    return float(returns.std() * np.sqrt(252) * 100)
+
+
+def legacy_calculate_metrics(df, currencies):
+    """Implementação anterior, mantida aqui apenas para comparação"""
+    metrics = {}
+    for currency in currencies:
+        if currency not in df.columns:
+            continue
+        values = pd.to_numeric(df[currency], errors='coerce').dropna()
+        if len(values) == 0:
+            continue
+        metrics[currency] = {
+            "current_value": float(values.iloc[-1]),
+            "change_7d": legacy_percentage_change(values, 7),
+            "change_30d": legacy_percentage_change(values, 30),
+            "change_90d": legacy_percentage_change(values, 90),
+            "volatility": legacy_volatility(values),
+            "data_points": len(values)
+        }
+    return metrics
+
+
+def make_frame(n_currencies, rows=ROWS, seed=7):
+    rng = np.random.default_rng(seed)
+    data = 5 + np.cumsum(rng.normal(0, 0.01, (rows, n_currencies)), axis=0)
+    # alguns buracos para exercitar o tratamento de ausentes
+    data[rng.random(data.shape) < 0.05] = np.nan
+    names = [f"C{i:03d}" for i in range(n_currencies)]
+    df = pd.DataFrame(data, columns=names)
+    df.insert(0, "date", pd.date_range("2024-01-01", periods=rows, freq="D"))
+    return df, names
+
+
+def assert_same(a, b):
+    assert a.keys() == b.keys()
+    for currency in a:
+        for field, value in a[currency].items():
+            other = b[currency][field]
+            assert (math.isnan(value) and math.isnan(other)) or math.isclose(value, other, rel_tol=1e-9), (currency, field)
+
+
+def timeit(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'moedas':>8} {'laço (ms)':>10} {'matricial (ms)':>15} {'ganho':>8}")
+    for n in CURRENCY_COUNTS:
+        df, names = make_frame(n)
+        assert_same(calculate_metrics(df, names), legacy_calculate_metrics(df, names))
+        old = timeit(legacy_calculate_metrics, df, names)
+        new = timeit(calculate_metrics, df, names)
+        print(f"{n:>8} {old * 1000:>10.1f} {new * 1000:>15.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
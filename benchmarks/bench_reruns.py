@@ -0,0 +1,100 @@
+"""
+Benchmark do tempo de servidor por interação (fragmentos do Streamlit).
+
+Antes dos fragmentos, qualquer interação (ex.: "🔄 Calcular" na calculadora)
+reexecutava o app inteiro; agora só o fragmento da calculadora roda.
+Este script mede, com os caches já aquecidos:
+  - antes:  uma execução completa do app.py;
+  - depois: uma execução do fragmento render_calculator com o clique em "Calcular".
+
+Para não depender da rede, as respostas da AwesomeAPI são sintéticas.
+
+Uso: python benchmarks/bench_reruns.py
+"""
+
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import services.api_client as api_client  # noqa: E402
+
+RUNS = 10
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class OfflineSession:
+    """Responde /json/daily e /json/last com dados sintéticos"""
+
+    def get(self, url, params=None, timeout=None):
+        daily = re.search(r"/daily/(\w+)-BRL/(\d+)", url)
+        if daily:
+            now = datetime.now()
+            return _Response([
+                {"timestamp": str(int((now - timedelta(days=i)).timestamp())), "bid": str(5 + (i % 17) * 0.01)}
+                for i in range(int(daily.group(2)))
+            ])
+        pairs = re.search(r"/last/([\w,-]+)", url).group(1).split(",")
+        return _Response({p.replace("-", ""): {"bid": "5.1"} for p in pairs})
+
+
+def calculator_app():
+    from components.sidebar import render_calculator
+    render_calculator()
+
+
+def median_ms(func):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    session = OfflineSession()
+    api_client.get_session = lambda: session
+    state_dir = tempfile.mkdtemp()
+    api_client.HISTORY_DB_PATH = os.path.join(state_dir, "history.db")
+    api_client.ROLLING_STATE_PATH = os.path.join(state_dir, "rolling_state.json")
+
+    full = AppTest.from_file("app.py", default_timeout=60)
+    full.run()  # aquece os caches
+
+    calculator = AppTest.from_function(calculator_app, default_timeout=60)
+    calculator.run()
+
+    def click_calculate():
+        calculator.button[0].click().run()
+
+    before = median_ms(full.run)
+    after = median_ms(click_calculate)
+
+    print(f"Interação na calculadora (mediana de {RUNS} execuções)")
+    print(f"  antes  (app completo):         {before:8.1f} ms")
+    print(f"  depois (fragmento calculadora): {after:8.1f} ms")
+    print(f"  redução: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,88 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-from utils.helpers import calculate_correlation_matrix
+from itertools import combinations
+from services.api_client import get_correlation_matrix, get_rolling_correlation, get_cross_currencies, get_cross_rates, get_cross_rate_changes, get_cross_rate_history, get_rollups, ROLLING_CORRELATION_WINDOW
+from utils.downsampling import downsample
+from utils.frames import column_values, date_values, frame_columns
+from utils.memo import figure_memo, fingerprint
+from utils.rollups import RESOLUTION_LABELS
 
+# Orçamento de pontos por série: largura do gráfico (px) x pontos por pixel
+CHART_WIDTH_PX = 1200
+POINTS_PER_PIXEL = 1
+DOWNSAMPLE_METHOD = "lttb"      # "lttb" ou "minmax"
 
-def render_temporal_chart(df, currencies):
+# Total de pontos a partir do qual o gráfico usa WebGL (Scattergl)
+SCATTERGL_THRESHOLD = 5000
+
+
+@st.fragment
+def render_temporal_chart(df, currencies, chart_width=CHART_WIDTH_PX, method=DOWNSAMPLE_METHOD, resolution="D"):
+    """
+    Evolução temporal das moedas. Cada série é reduzida a no máximo
+    `chart_width * POINTS_PER_PIXEL` pontos (LTTB ou min-max); ao estreitar
+    o intervalo exibido, os dados voltam à resolução completa.
+    Em períodos longos, `df` traz o fechamento dos agregados (`resolution` "W" ou "M").
+    Roda como fragmento: mexer no intervalo só reexecuta este gráfico.
+    """
 
     st.subheader("📊 Evolução Temporal (Histórico AwesomeAPI)")
 
-    fig = go.Figure()
+    dates = date_values(df)
+
+    if len(df) > 1:
+        start, end = dates.iloc[0].to_pydatetime(), dates.iloc[-1].to_pydatetime()
+        selected_range = st.slider(
+            "Intervalo exibido:",
+            min_value=start,
+            max_value=end,
+            value=(start, end),
+            format="DD/MM/YYYY",
+            key="temporal_range"
+        )
+        df = df[((dates >= selected_range[0]) & (dates <= selected_range[1])).to_numpy()]
+
+    max_points = int(chart_width * POINTS_PER_PIXEL)
+
+    # figuras idênticas (mesmos dados e parâmetros) são reaproveitadas entre reruns
+    fig, shown_points = figure_memo.get_or_build(
+        ("temporal", fingerprint(df, currencies, max_points, method)),
+        lambda: build_temporal_figure(df, currencies, max_points, method),
+        sizeof=lambda item: item[1] * len(currencies) * 16 + 1024
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+    if resolution != "D":
+        st.caption(f"Resolução {RESOLUTION_LABELS[resolution]}: fechamento de cada período, a partir dos agregados pré-calculados.")
+
+    if shown_points < len(df):
+        st.caption(f"Exibindo {shown_points} de {len(df)} pontos por moeda ({method.upper()}). Estreite o intervalo para ver a resolução completa.")
+
+
+def build_temporal_figure(df, currencies, max_points, method):
+    """Monta a figura da evolução temporal; retorna (figura, pontos exibidos por moeda)"""
+
+    traces = []
+    present = set(frame_columns(df))
+    dates = date_values(df).to_numpy()
 
     for c in currencies:
-        if c in df.columns and c != "BRL":
-            fig.add_trace(go.Scatter(
-                x=df["date"], y=df[c], mode="lines", name=c
-            ))
+        if c in present and c != "BRL":
+            x, y = downsample(dates, column_values(df, c), max_points, method)
+            traces.append((c, x, y))
+
+    # acima do limite, o WebGL (Scattergl) renderiza bem mais rápido no navegador
+    total_points = sum(len(y) for _, _, y in traces)
+    scatter = go.Scattergl if total_points > SCATTERGL_THRESHOLD else go.Scatter
+
+    fig = go.Figure()
+
+    for c, x, y in traces:
+        fig.add_trace(scatter(
+            x=x, y=y, mode="lines", name=c
+        ))
 
     fig.update_layout(
         height=500,
@@ -23,24 +91,233 @@ def render_temporal_chart(df, currencies):
         hovermode="x unified"
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig, (len(traces[0][2]) if traces else len(df))
+
+
+def render_rolling_analytics(rolling_data, windows):
+    """Médias móveis, volatilidade móvel e drawdown móvel por moeda"""
+
+    st.subheader("📉 Análise Móvel (Médias, Volatilidade e Drawdown)")
+
+    if not rolling_data:
+        st.info("Selecione moedas com dados suficientes.")
+        return
 
+    tab_ma, tab_vol, tab_dd = st.tabs(["Médias Móveis", "Volatilidade Móvel", "Drawdown Móvel"])
 
-def render_correlation_heatmap(df, currencies):
+    panels = [
+        (tab_ma, "ma", "Valor (BRL)"),
+        (tab_vol, "vol", "Volatilidade anualizada (%)"),
+        (tab_dd, "dd", "Drawdown (%)"),
+    ]
+
+    data_key = fingerprint(list(rolling_data), list(windows), *rolling_data.values())
+
+    for tab, prefix, y_title in panels:
+        fig = figure_memo.get_or_build(
+            ("rolling", prefix, data_key),
+            lambda: build_rolling_figure(rolling_data, windows, prefix, y_title)
+        )
+
+        with tab:
+            st.plotly_chart(fig, use_container_width=True)
+
+
+def build_rolling_figure(rolling_data, windows, prefix, y_title):
+    """Monta a figura de uma estatística móvel (ma, vol ou dd) para todas as moedas"""
+
+    fig = go.Figure()
+    for currency, df in rolling_data.items():
+        for w in windows:
+            fig.add_trace(go.Scatter(
+                x=df["date"], y=df[f"{prefix}_{w}"], mode="lines", name=f"{currency} {w}d"
+            ))
+
+    fig.update_layout(
+        height=400,
+        xaxis_title="Data",
+        yaxis_title=y_title,
+        hovermode="x unified"
+    )
+
+    return fig
+
+
+@st.fragment
+def render_correlation_heatmap(currencies, period):
+    """Heatmap de correlação do período e correlação móvel entre um par de moedas (fragmento isolado)"""
 
     st.subheader("🔥 Heatmap de Correlação (AwesomeAPI)")
 
-    corr = calculate_correlation_matrix(df, currencies)
+    mode = st.radio(
+        "Correlacionar:",
+        options=["Níveis de preço", "Retornos diários"],
+        horizontal=True,
+        key="correlation_mode"
+    )
+    use_returns = mode == "Retornos diários"
+
+    corr = get_correlation_matrix(currencies, period, use_returns)
     if corr is None:
         st.info("Selecione moedas com dados suficientes.")
         return
 
-    fig = px.imshow(
-        corr,
-        text_auto=".2f",
-        color_continuous_scale="RdBu_r",
-        zmin=-1,
-        zmax=1,
+    fig = figure_memo.get_or_build(
+        ("heatmap", fingerprint(corr)),
+        lambda: px.imshow(
+            corr,
+            text_auto=".2f",
+            color_continuous_scale="RdBu_r",
+            zmin=-1,
+            zmax=1,
+        )
     )
 
     st.plotly_chart(fig, use_container_width=True)
+
+    pairs = list(combinations([c for c in corr.columns if c != "BRL"], 2))
+    if not pairs:
+        return
+
+    st.markdown(f"#### 🔗 Correlação Móvel ({ROLLING_CORRELATION_WINDOW} dias)")
+    pair = st.selectbox(
+        "Par de moedas:",
+        options=[f"{x} x {y}" for x, y in pairs],
+        key="rolling_correlation_pair"
+    )
+    a, b = pair.split(" x ")
+
+    series = get_rolling_correlation(currencies, a, b, period, use_returns)
+
+    fig = figure_memo.get_or_build(
+        ("rolling_correlation", a, b, fingerprint(series)),
+        lambda: build_rolling_correlation_figure(series, a, b)
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def build_rolling_correlation_figure(series, a, b):
+    """Monta a figura da correlação móvel entre duas moedas"""
+
+    fig = go.Figure(go.Scatter(
+        x=series["date"], y=series["correlation"], mode="lines", name=f"{a} x {b}"
+    ))
+    fig.update_layout(
+        height=350,
+        xaxis_title="Data",
+        yaxis_title="Correlação",
+        yaxis_range=[-1, 1],
+        hovermode="x unified"
+    )
+
+    return fig
+
+
+@st.fragment
+def render_cross_rates(currencies, period):
+    """
+    Matrizes de taxas cruzadas (atuais e variação no período) e histórico de
+    um par (fragmento isolado: trocar o par só reexecuta esta seção)
+    """
+
+    st.subheader("🔀 Taxas Cruzadas")
+
+    # par do histórico (derivado das séries em BRL, sem requisições extras)
+    cross_currencies = get_cross_currencies()
+    col_base, col_quote, _ = st.columns([1, 1, 2])
+    with col_base:
+        base = st.selectbox("Base:", options=cross_currencies, index=cross_currencies.index("EUR"), key="cross_base")
+    with col_quote:
+        quote = st.selectbox("Cotada:", options=cross_currencies, index=cross_currencies.index("USD"), key="cross_quote")
+
+    pair_currencies = list(dict.fromkeys(list(currencies) + [base, quote]))
+    col_now, col_change = st.columns(2)
+
+    with col_now:
+        matrix = get_cross_rates(pair_currencies)
+        if matrix.empty:
+            st.info("Cotações atuais indisponíveis.")
+        else:
+            st.caption("Preço de 1 unidade da moeda da linha na moeda da coluna")
+            st.dataframe(matrix.style.format("{:.4f}", na_rep="--"), use_container_width=True)
+
+    with col_change:
+        changes = get_cross_rate_changes(pair_currencies, period)
+        if not changes.empty:
+            st.caption(f"Variação no período ({period}), em %")
+            st.dataframe(changes.style.format("{:+.2f}", na_rep="--"), use_container_width=True)
+
+    if base == quote:
+        st.info("Escolha moedas diferentes para ver o histórico do par.")
+        return
+
+    history = get_cross_rate_history(base, quote, period)
+    if history.empty:
+        st.info(f"Sem histórico para {base}/{quote}.")
+        return
+
+    fig = figure_memo.get_or_build(
+        ("cross_rate", base, quote, fingerprint(history)),
+        lambda: build_cross_rate_figure(history, base, quote)
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def build_cross_rate_figure(history, base, quote):
+    """Monta a figura da série histórica de um par cruzado"""
+
+    fig = go.Figure(go.Scatter(
+        x=history["date"], y=history[f"{base}/{quote}"], mode="lines", name=f"{base}/{quote}"
+    ))
+    fig.update_layout(
+        height=350,
+        xaxis_title="Data",
+        yaxis_title=f"{quote} por {base}",
+        hovermode="x unified"
+    )
+
+    return fig
+
+
+@st.fragment
+def render_candlestick(currencies, period):
+    """Candlestick (OHLC semanal ou mensal) de uma moeda, a partir dos agregados pré-calculados"""
+
+    options = [c for c in currencies if c != "BRL"]
+    if not options:
+        return
+
+    st.subheader("🕯️ Candlestick")
+    currency = st.selectbox("Moeda:", options=options, key="candlestick_currency")
+
+    resolution, rollups = get_rollups([currency], period, min_resolution="W")
+    ohlc = rollups.get(currency)
+    if ohlc is None or ohlc.empty:
+        st.info(f"Sem dados para {currency}.")
+        return
+
+    fig = figure_memo.get_or_build(
+        ("candlestick", currency, resolution, fingerprint(ohlc)),
+        lambda: build_candlestick_figure(ohlc, currency)
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"Resolução {RESOLUTION_LABELS[resolution]}")
+
+
+def build_candlestick_figure(ohlc, currency):
+    """Monta o candlestick de uma moeda"""
+
+    fig = go.Figure(go.Candlestick(
+        x=ohlc["date"], open=ohlc["open"], high=ohlc["high"], low=ohlc["low"], close=ohlc["close"], name=currency
+    ))
+    fig.update_layout(
+        height=450,
+        xaxis_title="Data",
+        yaxis_title="Valor (BRL)",
+        xaxis_rangeslider_visible=False
+    )
+
+    return fig
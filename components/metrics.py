@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from utils.helpers import format_currency_value, format_percentage
-from services.api_client import get_single_currency_rate
+from services.api_client import get_current_rates, get_quotes_refreshed_at
+from utils.memo import figure_memo, fingerprint
 
 
 def render_current_rates(selected_currencies):
@@ -9,6 +10,9 @@ def render_current_rates(selected_currencies):
 
     st.subheader("💵 Cotações Atuais (BC)")
 
+    # todas as cotações em uma única requisição
+    rates = get_current_rates(selected_currencies)
+
     cols = st.columns(len(selected_currencies))
 
     for idx, currency in enumerate(selected_currencies):
@@ -21,7 +25,7 @@ def render_current_rates(selected_currencies):
                 )
                 continue
 
-            rate = get_single_currency_rate(currency)
+            rate = rates.get(currency)
 
             if rate is not None:
                 st.metric(
@@ -34,6 +38,10 @@ def render_current_rates(selected_currencies):
                     value="R$ --.--"
                 )
 
+    refreshed_at = get_quotes_refreshed_at()
+    if refreshed_at is not None:
+        st.caption(f"🕒 Cotações atualizadas em {refreshed_at:%d/%m/%Y %H:%M:%S}")
+
 
 def render_metrics_cards(metrics_data, currencies):
     """Cards com métricas principais (valor atual + variação 7d)"""
@@ -69,6 +77,17 @@ def render_comparative_table(metrics_data, currencies):
 
     st.subheader("📋 Tabela Comparativa (AwesomeAPI)")
 
+    # a tabela formatada só é refeita quando as métricas mudam
+    df_table = figure_memo.get_or_build(
+        ("comparative_table", fingerprint(metrics_data, currencies)),
+        lambda: build_comparative_table(metrics_data, currencies)
+    )
+    st.dataframe(df_table, use_container_width=True, hide_index=True)
+
+
+def build_comparative_table(metrics_data, currencies):
+    """Monta o DataFrame formatado da tabela comparativa"""
+
     table_rows = []
 
     for currency in currencies:
@@ -84,5 +103,4 @@ def render_comparative_table(metrics_data, currencies):
             "Dados": metric.get("data_points", 0)
         })
 
-    df_table = pd.DataFrame(table_rows)
-    st.dataframe(df_table, use_container_width=True, hide_index=True)
+    return pd.DataFrame(table_rows)
@@ -1,6 +1,9 @@
+import os
+import pandas as pd
 import streamlit as st
-from services.api_client import get_single_currency_rate
+from services.api_client import get_single_currency_rate, clear_caches
 from utils.helpers import format_currency_value
+from utils import perf
 
 def render_sidebar():
     """Renderiza a sidebar e retorna moedas e período selecionados"""
@@ -26,33 +29,111 @@ def render_sidebar():
         st.subheader("📅 Período")
         time_period = st.selectbox(
             "Período de análise:",
-            options=["7 dias", "30 dias", "90 dias", "6 meses"],
+            options=["7 dias", "30 dias", "90 dias", "6 meses", "1 ano", "2 anos", "5 anos", "10 anos"],
             index=2
         )
+        st.checkbox("🕯️ Exibir candlestick", key="candlestick_view")
         
-        # Calculadora Rápida
+        # Calculadora Rápida (fragmento: interações aqui não reexecutam o dashboard)
         st.markdown("---")
-        st.markdown("**💱 Calculadora Rápida**")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            amount = st.number_input("Valor", min_value=0.0, value=100.0, step=10.0)
-        with col2:
-            from_currency = st.selectbox(
-                "De:", 
-                options=["USD", "EUR", "GBP", "JPY"],
-                index=0
-            )
-        
-        if st.button("🔄 Calcular", use_container_width=True, type="primary"):
-            rate = get_single_currency_rate(from_currency)
-            if rate:
-                converted_amount = amount * rate
-                st.success(f"**{amount:.0f} {from_currency} = {format_currency_value(converted_amount, 'BRL')}**")
+        render_calculator()
         
         st.markdown("---")
         if st.button("🔄 Atualizar Dashboard", use_container_width=True):
-            st.cache_data.clear()           # limpa cache das funções cacheadas
-            st.experimental_rerun()         # força recarregar a página
+            clear_caches()                  # limpa cache dos históricos e cotações
+            st.rerun()                      # força recarregar a página
+
+        return selected_currencies, time_period
+
+
+@st.fragment
+def render_calculator():
+    """Calculadora rápida de conversão para BRL (reexecuta de forma isolada)"""
+
+    st.markdown("**💱 Calculadora Rápida**")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        amount = st.number_input("Valor", min_value=0.0, value=100.0, step=10.0)
+    with col2:
+        from_currency = st.selectbox(
+            "De:", 
+            options=["USD", "EUR", "GBP", "JPY"],
+            index=0
+        )
+
+    if st.button("🔄 Calcular", use_container_width=True, type="primary"):
+        rate = get_single_currency_rate(from_currency)
+        if rate:
+            converted_amount = amount * rate
+            st.success(f"**{amount:.0f} {from_currency} = {format_currency_value(converted_amount, 'BRL')}**")
+
+
+def render_performance_panel(run, metrics):
+    """Painel recolhível com a duração das etapas, acertos de cache e requisições HTTP"""
+
+    with st.sidebar, st.expander("⏱️ Performance", expanded=False):
+        if run:
+            st.markdown("**Última execução**")
+            st.dataframe(
+                pd.DataFrame([(name, seconds * 1000) for name, seconds in run], columns=["Etapa", "ms"]),
+                hide_index=True, use_container_width=True,
+                column_config={"ms": st.column_config.NumberColumn(format="%.1f")}
+            )
+
+        if metrics["stages"]:
+            st.markdown("**Etapas (acumulado)**")
+            stages = pd.DataFrame([
+                (name, s["count"], s["total"] / s["count"] * 1000, s["max"] * 1000, metrics["errors"].get(name, 0))
+                for name, s in metrics["stages"].items()
+            ], columns=["Etapa", "Execuções", "Média (ms)", "Máx (ms)", "Falhas"])
+            st.dataframe(stages, hide_index=True, use_container_width=True,
+                         column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ["Média (ms)", "Máx (ms)"]})
+
+        if metrics["caches"]:
+            st.markdown("**Caches**")
+            caches = pd.DataFrame([
+                (name, c["hits"], c["misses"], c["hits"] / max(c["hits"] + c["misses"], 1) * 100)
+                for name, c in metrics["caches"].items()
+            ], columns=["Cache", "Hits", "Misses", "Acertos (%)"])
+            st.dataframe(caches, hide_index=True, use_container_width=True,
+                         column_config={"Acertos (%)": st.column_config.NumberColumn(format="%.0f")})
+
+        if metrics["http"]:
+            st.markdown("**Requisições HTTP**")
+            http = pd.DataFrame([
+                (host, c.get("requests", 0), c.get("failures", 0), c.get("retries", 0),
+                 c.get("seconds", 0.0) / max(c.get("requests", 0), 1) * 1000, c.get("circuit", "closed"))
+                for host, c in metrics["http"].items()
+            ], columns=["Host", "Requisições", "Falhas", "Retentativas", "Média (ms)", "Circuito"])
+            st.dataframe(http, hide_index=True, use_container_width=True,
+                         column_config={"Média (ms)": st.column_config.NumberColumn(format="%.1f")})
+
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("JSON", data=perf.to_json(metrics), file_name="metrics.json",
+                               mime="application/json", use_container_width=True)
+        with col_prom:
+            st.download_button("Prometheus", data=perf.to_prometheus(metrics), file_name="metrics.prom",
+                               mime="text/plain", use_container_width=True)
+
+
+def render_profile_report(report):
+    """Resumo do último perfil de execução (pontos quentes) e download do arquivo gerado"""
+
+    with st.sidebar, st.expander("🔬 Perfil da execução", expanded=True):
+        st.caption(f"Modo {report['mode']} • {report['elapsed'] * 1000:.0f} ms • {report['path']}")
+        top = pd.DataFrame(report["top"]).rename(columns={
+            "function": "Função", "calls": "Chamadas", "samples": "Amostras",
+            "self_s": "Própria (s)", "cumulative_s": "Acumulada (s)",
+        })
+        st.dataframe(top, hide_index=True, use_container_width=True,
+                     column_config={c: st.column_config.NumberColumn(format="%.4f") for c in ["Própria (s)", "Acumulada (s)"]})
 
-        return selected_currencies, time_period
\ No newline at end of file
+        try:
+            with open(report["path"], "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        st.download_button("Baixar perfil", data=data, file_name=os.path.basename(report["path"]),
+                           mime="application/octet-stream", use_container_width=True)
@@ -1,17 +1,223 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import requests
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
+from requests.adapters import HTTPAdapter
+
+from services.cache import make_cache
+from services.providers import HEDGE_AFTER, FunctionProvider, PtaxProvider, hedged_fetch
+from services.refresher import BackgroundRefresher
+from src.api.resilience import RateLimiter, get_stats, interactive_options, resilient_get
+from src.database.db import DB
+from src.processing.data_cleaner import DataCleaner, to_float64
+from utils import perf
+from utils.correlation import StreamingCorrelation
+from utils.crossrates import cross_rate_change_matrix, cross_rate_history, cross_rate_matrix
+from utils.frames import CONSTANT_COLUMNS, column_values, compact_frame, date_values, frame_columns
+from utils.rolling import RollingEngine
+from utils.rollups import RollupEngine, choose_resolution, daily_ohlc
 
 # Moedas suportadas
 SUPPORTED_CURRENCIES = ["USD", "EUR", "GBP", "JPY", "BRL"]
 
+# Número máximo de requisições simultâneas à AwesomeAPI
+MAX_CONCURRENT_REQUESTS = 4
+
+# Atualização em segundo plano (stale-while-revalidate), em segundos:
+# históricos e cotações são recarregados um pouco antes dos antigos TTLs (1800s e 300s)
+HISTORY_REFRESH_INTERVAL = 1500
+QUOTE_REFRESH_INTERVAL = 240
+REFRESH_JITTER = 0.1            # variação aleatória (fração do intervalo)
+REFRESH_IDLE_TIMEOUT = 7200     # chaves sem leitura por esse tempo deixam de ser atualizadas
+SHARED_REFRESH_MAX_AGE = 0.5    # fração do intervalo: valor mais novo no cache compartilhado dispensa a busca
+
+_refresher = BackgroundRefresher(idle_timeout=REFRESH_IDLE_TIMEOUT, max_workers=MAX_CONCURRENT_REQUESTS)
+
+# Cotações atuais: uma única chave com todas as moedas já pedidas
+QUOTES_KEY = ("last",)
+_tracked_quotes = set()
+_quote_lock = threading.Lock()
+
+# Cache compartilhado entre os processos do servidor ("memory" ou "sqlite"):
+# com "sqlite", N workers fazem uma única busca por chave na AwesomeAPI
+CACHE_BACKEND = os.environ.get("DASHBOARD_CACHE_BACKEND", "memory")
+CACHE_DB_PATH = os.environ.get("DASHBOARD_CACHE_PATH", "data/processed/shared_cache.db")
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MAX_ENTRIES = 256
+
+# Estatísticas móveis (médias, volatilidade e drawdown) mantidas de forma incremental
+ROLLING_WINDOWS = (20, 60)
+ROLLING_STATE_PATH = "data/processed/rolling_state.json"
+
+# Correlação incremental: janela (em dias) da série de correlação móvel entre pares
+ROLLING_CORRELATION_WINDOW = 30
+MAX_CORRELATION_ENGINES = 32
+
+# Provedores do histórico: AwesomeAPI (principal) e PTAX/BCB (hedge após HEDGE_AFTER segundos)
+HEDGED_REQUESTS = True
+PRIMARY_SOURCE = "awesomeapi"   # fonte dos motores incrementais (em df.attrs["source"])
+
+# Formato compacto (opcional) do bloco alinhado: DatetimeIndex, float32, BRL virtual
+# e um único buffer somente leitura compartilhado entre sessões
+COMPACT_FRAMES = os.environ.get("DASHBOARD_COMPACT_FRAMES", "0") == "1"
+MAX_ALIGNED_FRAMES = 32
+
+_session = None
+_providers = None
+_history_store = None
+_cache = None
+_rolling_engine = None
+_rollup_engine = None
+_correlation_engines = OrderedDict()   # (moedas, janela, retornos) -> StreamingCorrelation
+_aligned_frames = OrderedDict()        # (moedas, versões dos históricos) -> bloco compacto
+_resource_lock = threading.Lock()
+
+# Sincronização incremental: mantém o histórico em disco e baixa só os dias novos
+INCREMENTAL_SYNC = True
+HISTORY_DB_PATH = "data/processed/awesome_history.db"
+
+# Períodos disponíveis na sidebar (em dias)
+PERIOD_MAP = {
+    "7 dias": 7,
+    "30 dias": 30,
+    "90 dias": 90,
+    "6 meses": 180
+}
+
+# Janela buscada (e cacheada) por moeda; todos os períodos são recortes dela
+MAX_WINDOW_DAYS = max(PERIOD_MAP.values())
+
+# Períodos longos (em anos): servidos do armazenamento local após um backfill único
+LONG_PERIOD_MAP = {
+    "1 ano": 1,
+    "2 anos": 2,
+    "5 anos": 5,
+    "10 anos": 10
+}
+TRADING_DAYS_PER_YEAR = 252
+
+# Backfill em janelas de datas, em paralelo e com limite de ritmo
+BACKFILL_CHUNK_DAYS = 365
+BACKFILL_MAX_WORKERS = 8
+BACKFILL_RATE = 10              # requisições por segundo (todas as moedas)
+BACKFILL_TOLERANCE_DAYS = 7     # folga no início do período (fins de semana, feriados)
+
+_backfill_limiter = RateLimiter(BACKFILL_RATE)
+_backfilled = {}                # moeda -> trechos (início, fim) já buscados nesta execução
+_backfill_lock = threading.Lock()
+
+
+def get_session():
+    """Sessão HTTP compartilhada (keep-alive) com pool de conexões"""
+
+    global _session
+    with _resource_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def get_providers():
+    """Provedores do histórico, na ordem de preferência"""
+
+    global _providers
+    with _resource_lock:
+        if _providers is None:
+            _providers = [
+                FunctionProvider(PRIMARY_SOURCE, load_history, SUPPORTED_CURRENCIES),
+                PtaxProvider(),
+            ]
+    return _providers
+
+
+def get_history_store():
+    """Armazenamento local do histórico já baixado (SQLite)"""
+
+    global _history_store
+    with _resource_lock:
+        if _history_store is None:
+            _history_store = DB(filepath=HISTORY_DB_PATH)
+    return _history_store
+
+
+def get_cache():
+    """Backend de cache configurado em CACHE_BACKEND"""
+
+    global _cache
+    with _resource_lock:
+        if _cache is None:
+            if CACHE_BACKEND == "sqlite":
+                _cache = make_cache("sqlite", filepath=CACHE_DB_PATH, max_bytes=CACHE_MAX_BYTES)
+            else:
+                _cache = make_cache(CACHE_BACKEND, max_entries=CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def get_rolling_engine():
+    """Motor de estatísticas móveis, carregado do estado salvo em disco"""
+
+    global _rolling_engine
+    with _resource_lock:
+        perf.cache_event("rolling_engine", hit=_rolling_engine is not None)
+        if _rolling_engine is None:
+            _rolling_engine = RollingEngine.load(ROLLING_STATE_PATH, windows=ROLLING_WINDOWS)
+    return _rolling_engine
+
+
+def get_rollup_engine():
+    """Agregados semanais/mensais (OHLC) mantidos de forma incremental"""
+
+    global _rollup_engine
+    with _resource_lock:
+        perf.cache_event("rollup_engine", hit=_rollup_engine is not None)
+        if _rollup_engine is None:
+            _rollup_engine = RollupEngine()
+    return _rollup_engine
+
+
+def set_cache_backend(cache):
+    """Substitui o backend de cache (qualquer implementação de services.cache.CacheBackend)"""
+
+    global _cache
+    with _resource_lock:
+        _cache = cache
+
+
+def shared_loader(key, loader, ttl):
+    """Envolve `loader` para passar pelo cache compartilhado (uma carga por chave entre processos)"""
+
+    return lambda: get_cache().get_or_load(key, loader, ttl)
+
+
+def shared_refresher(key, loader, ttl):
+    """
+    Versão de `shared_loader` para a atualização em segundo plano. O valor em
+    cache pode ter quase `ttl` segundos, então só vale o gravado há menos de
+    SHARED_REFRESH_MAX_AGE * ttl (em geral, a atualização de outro processo
+    neste mesmo ciclo); senão, só quem obtém o lease da chave vai à fonte.
+    Com N processos, cada chave é buscada uma vez por intervalo.
+    """
+
+    min_remaining = ttl * (1 - SHARED_REFRESH_MAX_AGE)
+    return lambda: get_cache().get_or_load(key, loader, ttl, min_remaining=min_remaining)
+
 
-@st.cache_data(ttl=1800)
 def fetch_from_awesome(currency: str, days: int):
     """
     Busca dados históricos da AwesomeAPI:
     https://economia.awesomeapi.com.br/json/daily/USD-BRL/90
+    O resultado fica em memória e é atualizado em segundo plano, então só
+    a primeira leitura de cada moeda espera pela API. O DataFrame devolvido
+    é compartilhado entre sessões e não deve ser modificado.
     """
 
     if currency == "BRL":
@@ -19,87 +225,902 @@ def fetch_from_awesome(currency: str, days: int):
         dates = pd.date_range(datetime.now()-timedelta(days=days), datetime.now())
         return pd.DataFrame({"date": dates, "BRL": 1.0})
 
+    try:
+        key = ("daily", currency, days)
+        # primeira carga: o usuário espera, então vale o prazo curto do caminho interativo
+        return _refresher.get(
+            key,
+            shared_loader(key, partial(load_series, currency, days, interactive=True), HISTORY_REFRESH_INTERVAL),
+            interval=HISTORY_REFRESH_INTERVAL,
+            jitter=REFRESH_JITTER,
+            refresh=shared_refresher(key, partial(load_series, currency, days), HISTORY_REFRESH_INTERVAL),
+        )
+
+    except Exception:
+        # fonte fora do ar (ou circuito aberto): serve o último histórico salvo localmente
+        return load_stored_history(currency, days)
+
+
+def load_series(currency, days, interactive=False):
+    """
+    Histórico de uma moeda no esquema comum (date, <moeda>). Com HEDGED_REQUESTS,
+    se a AwesomeAPI não responder em HEDGE_AFTER segundos (ou falhar), a PTAX
+    do BCB é consultada em paralelo e vale a primeira resposta. O provedor
+    vencedor fica em df.attrs["source"] (ver is_fallback_series). Com
+    `interactive`, as requisições à AwesomeAPI usam o prazo curto de
+    src.api.resilience.INTERACTIVE_DEADLINE.
+    """
+
+    if not HEDGED_REQUESTS:
+        df, source = load_history(currency, days, interactive=interactive), PRIMARY_SOURCE
+    else:
+        df, source = hedged_fetch(get_providers(), currency, days, hedge_after=HEDGE_AFTER, interactive=interactive)
+    df.attrs["source"] = source
+    return df
+
+
+def is_fallback_series(currency, df):
+    """
+    True se a série de uma moeda da AwesomeAPI veio de outro provedor (PTAX).
+    A compra PTAX e o bid da AwesomeAPI têm níveis diferentes, então essas
+    séries não alimentam os motores incrementais (móveis, correlação e
+    agregados), que continuariam a série da AwesomeAPI com um salto.
+    """
+
+    return currency in SUPPORTED_CURRENCIES and df.attrs.get("source", PRIMARY_SOURCE) != PRIMARY_SOURCE
+
+
+def load_history(currency, days, interactive=False):
+    """
+    Carrega o histórico de uma moeda direto da fonte (sem cache).
+    Com INCREMENTAL_SYNC ativo, só os dias que ainda não estão no
+    armazenamento local são baixados.
+    """
+
+    if INCREMENTAL_SYNC:
+        return sync_history(currency, days, interactive)
+    return download_daily(currency, days, interactive)
+
+
+def load_stored_history(currency, days):
+    """Últimos `days` registros já salvos no armazenamento local (vazio se não houver)"""
+
+    try:
+        history = get_history_store().read_last(currency, days)
+    except Exception:
+        return pd.DataFrame()
+    if history.empty:
+        return pd.DataFrame()
+    return history.rename(columns={"value": currency})
+
+
+def download_daily(currency, days, interactive=False):
+    """Baixa os `days` registros diários mais recentes de uma moeda (sem cache)"""
+
     url = f"https://economia.awesomeapi.com.br/json/daily/{currency}-BRL/{days}"
 
+    r = resilient_get(get_session(), url, **(interactive_options() if interactive else {}))
+    data = r.json()
+
+    df = pd.DataFrame(data)
+    df["date"] = pd.to_datetime(df["timestamp"].astype(int), unit="s")
+    df[currency] = pd.to_numeric(df["bid"], errors="coerce")
+
+    return df[["date", currency]].sort_values("date")
+
+
+def download_daily_range(currency, start, end):
+    """Baixa os registros diários de uma moeda entre `start` e `end` (AwesomeAPI, sem cache)"""
+
+    limit = (end - start).days + 1
+    url = f"https://economia.awesomeapi.com.br/json/daily/{currency}-BRL/{limit}"
+    params = {"start_date": start.strftime("%Y%m%d"), "end_date": end.strftime("%Y%m%d")}
+
+    _backfill_limiter.acquire()
+    data = resilient_get(get_session(), url, params=params).json()
+    if not data:
+        return pd.DataFrame(columns=["date", currency])
+
+    df = pd.DataFrame(data)
+    df["date"] = pd.to_datetime(df["timestamp"].astype(int), unit="s")
+    df[currency] = pd.to_numeric(df["bid"], errors="coerce")
+    return df[["date", currency]]
+
+
+def download_ptax_range(currency, start, end):
+    """Fechamento PTAX diário de uma moeda entre `start` e `end` (janelas em paralelo via CurrencyAPI)"""
+
+    provider = next((p for p in get_providers() if isinstance(p, PtaxProvider)), None)
+    if provider is None:
+        return pd.DataFrame(columns=["date", currency])
+
+    records = provider.get_api().iter_range(currency, start.strftime("%m-%d-%Y"), end.strftime("%m-%d-%Y"))
+    daily = DataCleaner(records).clean_and_transform()
+    if daily.empty:
+        return pd.DataFrame(columns=["date", currency])
+    # o armazenamento guarda float64: desfaz o arredondamento do float32 do DataCleaner
+    return pd.DataFrame({"date": daily["dataHoraCotacao"], currency: to_float64(daily["cotacaoCompra"])})
+
+
+def missing_ranges(dates, start, end, tolerance=BACKFILL_TOLERANCE_DAYS):
+    """
+    Trechos [(início, fim)] entre `start` e `end` sem nenhum registro por mais
+    de `tolerance` dias corridos: o início ainda não baixado e os buracos internos.
+    """
+
+    cursor = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    days = sorted(set(pd.to_datetime(pd.Series(dates, dtype="datetime64[ns]")).dt.normalize()))
+
+    ranges = []
+    for day in days + [end + timedelta(days=1)]:
+        if day < cursor:
+            continue
+        if (day - cursor).days > tolerance:
+            ranges.append((cursor.to_pydatetime(), (day - timedelta(days=1)).to_pydatetime()))
+        cursor = day + timedelta(days=1)
+    return ranges
+
+
+def download_window(currency, start, end):
+    """
+    Uma janela do backfill: (DataFrame, ok). Uma falha vira janela vazia
+    (ok=False), para que as demais sejam gravadas e ela seja tentada de novo.
+    """
+
+    download = download_daily_range if currency in SUPPORTED_CURRENCIES else download_ptax_range
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
+        return download(currency, start, end), True
+    except Exception as e:
+        perf.error("backfill")
+        print(f"Aviso: falha no backfill de {currency} ({start:%Y-%m-%d} a {end:%Y-%m-%d}): {e}")
+        return pd.DataFrame(columns=["date", currency]), False
 
-        df = pd.DataFrame(data)
-        df["date"] = pd.to_datetime(df["timestamp"].astype(int), unit="s")
-        df[currency] = pd.to_numeric(df["bid"], errors="coerce")
 
-        return df[["date", currency]].sort_values("date")
+def sync_ptax_tail(currency):
+    """
+    Atualiza a cauda de uma moeda só da PTAX (sem sincronização pela AwesomeAPI),
+    substituindo a partir do dia do último registro salvo.
+    """
 
-    except:
-        return pd.DataFrame()
+    store = get_history_store()
+    last = store.get_last_date(currency)
+    if last is None:
+        return 0
+
+    data, ok = download_window(currency, last.normalize().to_pydatetime(), datetime.now())
+    data = data.dropna()
+    if not ok or data.empty:
+        return 0
+    return store.replace_from(currency, last.normalize(), pd.DataFrame({
+        "currency": currency,
+        "date": data["date"],
+        "value": data[currency],
+    }))
+
+
+def backfill_history(currency, years, max_workers=BACKFILL_MAX_WORKERS):
+    """
+    Completa o histórico local de uma moeda nos últimos `years` anos, baixando
+    apenas os trechos sem registros (ver missing_ranges): o início ainda não
+    buscado e buracos internos, como o deixado por sync_history após um longo
+    período sem uso. Moedas só da PTAX também têm a cauda atualizada aqui.
+    Cada trecho é dividido em janelas de BACKFILL_CHUNK_DAYS buscadas em
+    paralelo (no ritmo de BACKFILL_RATE); janelas que falham ficam para a
+    próxima carga e o que chegou é gravado. Retorna o número de registros novos.
+    """
+
+    target_start = (datetime.now() - timedelta(days=365 * years)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    inserted = 0
+    if currency not in SUPPORTED_CURRENCIES:
+        inserted += sync_ptax_tail(currency)
+
+    store = get_history_store()
+    stored = store.read_range(currency, start=target_start)["date"]
+    with _backfill_lock:
+        done = set(_backfilled.get(currency, ()))
+    gaps = [g for g in missing_ranges(stored, target_start, datetime.now()) if g not in done]
+    if not gaps:
+        return inserted
+
+    windows, owners = [], []
+    for gap, (start, span_end) in enumerate(gaps):
+        while start <= span_end:
+            end = min(start + timedelta(days=BACKFILL_CHUNK_DAYS - 1), span_end)
+            windows.append((currency, start, end))
+            owners.append(gap)
+            start = end + timedelta(days=1)
+    results = fetch_many(download_window, windows, max_workers)
+
+    chunks = [data for data, _ in results if not data.empty]
+    if chunks:
+        data = pd.concat(chunks, ignore_index=True).dropna()
+        data = data.drop_duplicates(subset="date").sort_values("date")
+        # um registro por dia: não duplica dias já salvos (horários variam entre fontes)
+        data = data[~data["date"].dt.normalize().isin(stored.dt.normalize())]
+        inserted += store.insert_many(pd.DataFrame({
+            "currency": currency,
+            "date": data["date"],
+            "value": data[currency],
+        }))
+
+    failed = {owners[i] for i, (_, ok) in enumerate(results) if not ok}
+    with _backfill_lock:
+        # trechos buscados sem falha não são pedidos de novo nesta execução (mesmo que venham vazios)
+        _backfilled.setdefault(currency, set()).update(g for i, g in enumerate(gaps) if i not in failed)
+    return inserted
+
+
+def get_long_series(currencies, years, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Séries de `years` anos das moedas cotadas ({moeda: DataFrame date/<moeda>}),
+    servidas do armazenamento local. A cada carga, cada moeda é completada
+    por backfill_history (moedas em paralelo); se a busca falhar, vale o que
+    já está salvo. O resultado fica no cache compartilhado.
+    """
+
+    quoted = [c for c in currencies if c not in CONSTANT_COLUMNS]
+
+    def complete(currency):
+        try:
+            backfill_history(currency, years)
+        except Exception as e:
+            perf.error("backfill")
+            print(f"Aviso: backfill de {currency} interrompido ({e}). Servindo o histórico salvo.")
+
+    def load():
+        # a cauda recente continua vindo da sincronização incremental
+        fetch_many(fetch_from_awesome, [(c, MAX_WINDOW_DAYS) for c in quoted], max_workers)
+        fetch_many(complete, [(c,) for c in quoted], max_workers)
 
+        start = datetime.now() - timedelta(days=365 * years)
+        store = get_history_store()
+        series = {}
+        for c in quoted:
+            history = store.read_range(c, start=start)
+            if not history.empty:
+                series[c] = history.rename(columns={"value": c})
+        return series
 
-def get_exchange_data(currencies, period="90 dias"):
-    """Retorna dataframe unificado para todas as moedas."""
+    return get_cache().get_or_load(("long", tuple(quoted), years), load, HISTORY_REFRESH_INTERVAL)
 
-    period_map = {
-        "7 dias": 7,
-        "30 dias": 30,
-        "90 dias": 90,
-        "6 meses": 180
-    }
 
-    days = period_map.get(period, 90)
+def get_long_history(currencies, years, max_workers=MAX_CONCURRENT_REQUESTS, compact=False):
+    """Bloco alinhado de `years` anos das moedas (ver get_long_series)"""
 
-    series_dict = {}
+    series_dict = get_long_series(currencies, years, max_workers)
 
+    if compact:
+        return compact_long_frame(series_dict, currencies, years)
+
+    series_dict = dict(series_dict)
+    for c in currencies:
+        if c in CONSTANT_COLUMNS:
+            series_dict[c] = fetch_from_awesome(c, 365 * years)
+    return wide_frame({c: series_dict[c] for c in currencies if c in series_dict}, currencies)
+
+
+def compact_long_frame(series_dict, currencies, years):
+    """Formato compacto (utils.frames) do histórico longo"""
+
+    combined = combine_series(series_dict)
+    constants = {c: CONSTANT_COLUMNS[c] for c in currencies if c in CONSTANT_COLUMNS}
+    if combined.empty:
+        if not constants:
+            return pd.DataFrame()
+        dates = pd.date_range(datetime.now() - timedelta(days=365 * years), datetime.now())
+        return compact_frame(dates, np.empty((len(dates), 0)), [], constants, order=currencies)
+    columns = [c for c in combined.columns if c != "date"]
+    return compact_frame(combined["date"], combined[columns].to_numpy(), columns, constants, order=currencies)
+
+
+def sync_history(currency, days, interactive=False):
+    """
+    Atualiza o histórico local de uma moeda baixando apenas a cauda que falta
+    e devolve os `days` registros mais recentes.
+    """
+
+    store = get_history_store()
+    last_date = store.get_last_date(currency)
+
+    if last_date is None or store.count(currency) < days:
+        # sem histórico suficiente: baixa a janela completa
+        missing = days
+    else:
+        # dias corridos desde o último registro (inclui o próprio dia, cuja cotação ainda muda)
+        missing = max((datetime.now() - last_date.normalize()).days + 1, 1)
+
+    new_data = download_daily(currency, min(missing, days), interactive)
+
+    if not new_data.empty:
+        # a API devolve um único registro por dia, com horário variável:
+        # substitui tudo a partir do primeiro dia recebido (numa única transação)
+        store.replace_from(currency, new_data["date"].min().normalize(), pd.DataFrame({
+            "currency": currency,
+            "date": new_data["date"],
+            "value": new_data[currency],
+        }))
+
+    history = store.read_last(currency, days)
+    return history.rename(columns={"value": currency})
+
+
+def period_days(period):
+    """Número de registros (dias úteis) de um período da sidebar"""
+
+    if period in LONG_PERIOD_MAP:
+        return LONG_PERIOD_MAP[period] * TRADING_DAYS_PER_YEAR
+    return PERIOD_MAP.get(period, 90)
+
+
+def get_exchange_data(currencies, period="90 dias", max_workers=MAX_CONCURRENT_REQUESTS, compact=None):
+    """
+    Retorna dataframe unificado para todas as moedas.
+    As moedas são buscadas em paralelo (até `max_workers` por vez),
+    então o tempo de carga fica próximo ao de uma única requisição.
+    Com `compact` (padrão: COMPACT_FRAMES), devolve uma visão somente
+    leitura do bloco compacto compartilhado (ver utils.frames).
+    """
+
+    # uma única janela (a maior) fica em cache por moeda; os períodos menores são recortes
+    targets = [c for c in currencies if supports_currency(c)]
+
+    if period in LONG_PERIOD_MAP:
+        compact = COMPACT_FRAMES if compact is None else compact
+        return get_long_history(targets, LONG_PERIOD_MAP[period], max_workers, compact)
+
+    days = PERIOD_MAP.get(period, 90)
+    results = fetch_many(fetch_from_awesome, [(c, MAX_WINDOW_DAYS) for c in targets], max_workers)
+    frames = {c: df for c, df in zip(targets, results) if not df.empty}
+    start = period_start(frames, days)
+
+    # os dois formatos recortam o mesmo bloco alinhado a partir de `start` (mesmas linhas)
+    if COMPACT_FRAMES if compact is None else compact:
+        frame = get_aligned_frame(targets, max_workers)
+        return frame.iloc[frame.index.searchsorted(start):]
+
+    return wide_frame(frames, targets, start)
+
+
+def period_start(frames, days):
+    """
+    Primeira data de um período de `days` registros: o início da janela da
+    moeda cotada que começa mais cedo (constantes como o BRL não contam).
+    """
+
+    starts = [df["date"].iloc[-days:].iloc[0] for c, df in frames.items() if c not in CONSTANT_COLUMNS]
+    if not starts:
+        return datetime.now() - timedelta(days=days)
+    return min(starts)
+
+
+def wide_frame(frames, currencies, start=None):
+    """
+    Formato largo do bloco alinhado: as moedas cotadas são combinadas (ver
+    combine_series) e recortadas a partir de `start`, e as constantes viram
+    colunas nessas mesmas datas, como no formato compacto. Só com constantes,
+    vale a série sintética delas (uma linha por dia corrido).
+    """
+
+    quoted = {c: df for c, df in frames.items() if c not in CONSTANT_COLUMNS}
+    if not quoted:
+        constants = {c: df if start is None else df[df["date"] >= start] for c, df in frames.items()}
+        return combine_series(constants)
+
+    combined = combine_series(quoted)
+    if start is not None:
+        combined = combined[combined["date"] >= start].reset_index(drop=True)
     for c in currencies:
-        if c not in SUPPORTED_CURRENCIES:
+        if c in CONSTANT_COLUMNS and c in frames:
+            combined[c] = CONSTANT_COLUMNS[c]
+    return combined[["date"] + [c for c in currencies if c in combined.columns]]
+
+
+def get_aligned_frame(currencies, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Bloco alinhado (MAX_WINDOW_DAYS) das moedas no formato compacto, montado
+    uma vez por versão dos históricos e compartilhado entre sessões; os
+    períodos são recortes sem cópia (iloc) deste bloco.
+    """
+
+    quoted = [c for c in currencies if c not in CONSTANT_COLUMNS]
+    results = fetch_many(fetch_from_awesome, [(c, MAX_WINDOW_DAYS) for c in quoted], max_workers)
+
+    # a versão de cada histórico é o instante da sua última carga
+    versions = tuple(_refresher.last_refreshed(("daily", c, MAX_WINDOW_DAYS)) for c in quoted)
+    key = (tuple(currencies), versions)
+
+    with _resource_lock:
+        frame = _aligned_frames.get(key)
+        if frame is not None:
+            _aligned_frames.move_to_end(key)
+            perf.cache_event("aligned_frames", hit=True)
+            return frame
+    perf.cache_event("aligned_frames", hit=False)
+
+    combined = combine_series({c: df for c, df in zip(quoted, results) if not df.empty})
+    columns = [c for c in combined.columns if c != "date"]
+    constants = {c: CONSTANT_COLUMNS[c] for c in currencies if c in CONSTANT_COLUMNS}
+
+    if combined.empty and constants:
+        # só moedas constantes: uma linha por dia corrido, como a série sintética do BRL
+        dates = pd.date_range(datetime.now() - timedelta(days=MAX_WINDOW_DAYS), datetime.now())
+    elif combined.empty:
+        return pd.DataFrame()
+    else:
+        dates = combined["date"]
+
+    block = combined[columns].to_numpy() if columns else np.empty((len(dates), 0))
+    frame = compact_frame(dates, block, columns, constants, order=currencies)
+
+    # históricos que falharam (sem versão) não entram no cache
+    if None not in versions:
+        with _resource_lock:
+            _aligned_frames[key] = frame
+            while len(_aligned_frames) > MAX_ALIGNED_FRAMES:
+                _aligned_frames.popitem(last=False)
+
+    return frame
+
+
+def get_cross_currencies():
+    """Moedas disponíveis para taxas cruzadas: as da AwesomeAPI e as da PTAX (BCB)"""
+
+    symbols = set(SUPPORTED_CURRENCIES)
+    for provider in get_providers():
+        if isinstance(provider, PtaxProvider):
+            symbols.update(provider.available())
+    return sorted(symbols)
+
+
+def supports_currency(currency):
+    """True se algum provedor tem histórico da moeda (ou se é a constante BRL)"""
+
+    return currency in CONSTANT_COLUMNS or any(p.supports(currency) for p in get_providers())
+
+
+def get_cross_rates(currencies):
+    """
+    Matriz N x N das taxas cruzadas atuais (linha = base, coluna = cotada),
+    derivada das cotações contra o BRL já em cache: nenhuma requisição por par.
+    """
+
+    return cross_rate_matrix(get_current_rates(currencies))
+
+
+def cross_rate_daily_block(currencies, period="90 dias"):
+    """
+    Bloco (dias x moedas) das cotações em BRL usado pelas taxas cruzadas: uma
+    linha por dia normalizado (AwesomeAPI e PTAX publicam em horários
+    diferentes), preenchida para frente e recortada no período.
+    """
+
+    wanted = list(dict.fromkeys(c for c in currencies if supports_currency(c)))
+    quoted = [c for c in wanted if c not in CONSTANT_COLUMNS]
+
+    if period in LONG_PERIOD_MAP:
+        frames = get_long_series(quoted, LONG_PERIOD_MAP[period])
+    else:
+        frames = dict(zip(quoted, fetch_many(fetch_from_awesome, [(c, MAX_WINDOW_DAYS) for c in quoted])))
+
+    # moedas constantes (BRL) entram só como coluna; daily_block as preenche
+    frames = {c: frames.get(c) for c in wanted if c in CONSTANT_COLUMNS or (c in frames and not frames[c].empty)}
+    if not any(c not in CONSTANT_COLUMNS for c in frames):
+        return pd.DataFrame(columns=list(frames))
+
+    return daily_block(frames).ffill().iloc[-period_days(period):]
+
+
+def get_cross_rate_matrix_history(currencies, period="90 dias"):
+    """Histórico N x N das taxas cruzadas das moedas no período (date + uma coluna "<base>/<cotada>" por par)"""
+
+    block = cross_rate_daily_block(currencies, period)
+    return cross_rate_history(block.index, block.to_numpy(), list(block.columns))
+
+
+def get_cross_rate_history(base, quote, period="90 dias"):
+    """Série histórica do par base/cotada, recortada do histórico N x N"""
+
+    column = f"{base}/{quote}"
+    history = get_cross_rate_matrix_history([base, quote], period)
+    if column not in history.columns:
+        return pd.DataFrame(columns=["date", column])
+    return history[["date", column]]
+
+
+def get_cross_rate_changes(currencies, period="90 dias"):
+    """Matriz N x N da variação (%) de cada taxa cruzada no período"""
+
+    block = cross_rate_daily_block(currencies, period)
+    return cross_rate_change_matrix(block.to_numpy(), list(block.columns))
+
+
+def period_span_days(period):
+    """Duração do período em dias corridos"""
+
+    if period in LONG_PERIOD_MAP:
+        return 365 * LONG_PERIOD_MAP[period]
+    return int(period_days(period) * 7 / 5)
+
+
+def period_resolution(period, min_resolution="D"):
+    """Resolução ("D", "W" ou "M") usada para o período (ver utils.rollups.choose_resolution)"""
+
+    return choose_resolution(period_span_days(period), min_resolution=min_resolution)
+
+
+def get_rollups(currencies, period="90 dias", min_resolution="D"):
+    """
+    Séries OHLC/média das moedas na resolução mais grossa que ainda representa
+    bem o período (diária, semanal ou mensal; ver utils.rollups.choose_resolution).
+    Retorna (resolução, {moeda: DataFrame date/open/high/low/close/mean}).
+    """
+
+    resolution = period_resolution(period, min_resolution)
+    quoted = [c for c in currencies if c not in CONSTANT_COLUMNS and supports_currency(c)]
+
+    if period in LONG_PERIOD_MAP:
+        series = get_long_series(quoted, LONG_PERIOD_MAP[period])
+    else:
+        frames = fetch_many(fetch_from_awesome, [(c, MAX_WINDOW_DAYS) for c in quoted])
+        series = {c: df for c, df in zip(quoted, frames) if not df.empty}
+
+    start = datetime.now() - timedelta(days=period_span_days(period))
+    engine = get_rollup_engine()
+    result = {}
+
+    for c, df in series.items():
+        if resolution == "D":
+            result[c] = daily_ohlc(df["date"], df[c]).iloc[-period_days(period):].reset_index(drop=True)
+            continue
+        # série reserva (PTAX): agregados avulsos, sem tocar no estado da AwesomeAPI
+        target = RollupEngine(engine.resolutions) if is_fallback_series(c, df) else engine
+        target.update(c, df["date"], df[c])
+        result[c] = target.frame(c, resolution, start=start)
+
+    return resolution, result
+
+
+def rollup_closes(rollups):
+    """Formato largo (date + uma coluna por moeda) com o fechamento de cada balde"""
+
+    return combine_series({c: df[["date", "close"]].rename(columns={"close": c}) for c, df in rollups.items() if not df.empty})
+
+
+def get_rolling_analytics(currencies, period="90 dias"):
+    """
+    Médias móveis, volatilidade móvel e drawdown móvel (janelas ROLLING_WINDOWS)
+    de cada moeda no período escolhido. Só as observações novas desde a
+    última chamada são processadas; o estado é salvo quando entra um dia
+    novo (revisões do dia corrente, no máximo a cada REVISION_SAVE_INTERVAL).
+    Nos períodos longos, o histórico salvo (get_long_series) é processado
+    uma vez quando começa antes do estado guardado da moeda.
+    """
+
+    days = period_days(period)
+    engine = get_rolling_engine()
+    quoted = [c for c in currencies if c != "BRL" and c in SUPPORTED_CURRENCIES]
+    long_series = get_long_series(quoted, LONG_PERIOD_MAP[period]) if period in LONG_PERIOD_MAP else {}
+    tolerance = timedelta(days=BACKFILL_TOLERANCE_DAYS)
+    result = {}
+
+    for c in quoted:
+        history = long_series.get(c)
+        if history is not None and not history.empty:
+            first = engine.first_date(c)
+            if first is None or history["date"].iloc[0] < first - tolerance:
+                # o estado só cobre a janela recente: recomputa a partir do histórico longo
+                engine.reset(c)
+                engine.update(c, history["date"], history[c])
+
+        df = fetch_from_awesome(c, MAX_WINDOW_DAYS)
+        # série reserva (PTAX): mantém o último estado da AwesomeAPI, que retoma de onde parou
+        if not df.empty and not is_fallback_series(c, df):
+            engine.update(c, df["date"], df[c])
+        frame = engine.frame(c)
+        if not frame.empty:
+            result[c] = frame.iloc[-days:]
+
+    engine.maybe_save(ROLLING_STATE_PATH)
+
+    return result
+
+
+def history_frames(currencies, period="90 dias"):
+    """
+    Históricos das moedas da AwesomeAPI com dados ({moeda: DataFrame}): a janela
+    de MAX_WINDOW_DAYS ou, nos períodos longos, a série de get_long_series.
+    """
+
+    quoted = [c for c in dict.fromkeys(currencies) if c in SUPPORTED_CURRENCIES]
+    if period in LONG_PERIOD_MAP:
+        years = LONG_PERIOD_MAP[period]
+        long_series = get_long_series(quoted, years)
+        frames = {
+            c: fetch_from_awesome(c, 365 * years) if c in CONSTANT_COLUMNS else long_series.get(c, pd.DataFrame())
+            for c in quoted
+        }
+    else:
+        frames = {c: fetch_from_awesome(c, MAX_WINDOW_DAYS) for c in quoted}
+    return {c: df for c, df in frames.items() if not df.empty}
+
+
+def get_correlation_engine(currencies, window=None, use_returns=False, period="90 dias"):
+    """
+    Motor de correlação incremental das moedas (com dados) selecionadas.
+    Cada motor é reaproveitado entre reruns e só recebe os dias novos.
+    A fonte de cada série entra na chave: se uma moeda passa para a PTAX
+    (reserva), um motor separado é montado, e o da AwesomeAPI é retomado
+    quando ela volta. Os períodos longos usam o histórico salvo (ver
+    history_frames), num motor próprio. Retorna None se houver menos de
+    duas moedas com dados.
+    """
+
+    frames = history_frames(currencies, period)
+    if len(frames) < 2:
+        return None
+
+    sources = tuple(is_fallback_series(c, df) for c, df in frames.items())
+    key = (tuple(frames), window, use_returns, sources, LONG_PERIOD_MAP.get(period))
+    with _resource_lock:
+        engine = _correlation_engines.get(key)
+        perf.cache_event("correlation_engines", hit=engine is not None)
+        if engine is None:
+            engine = _correlation_engines[key] = StreamingCorrelation(frames, window=window, use_returns=use_returns)
+        _correlation_engines.move_to_end(key)
+        while len(_correlation_engines) > MAX_CORRELATION_ENGINES:
+            _correlation_engines.popitem(last=False)
+
+    block = daily_block(frames, since=engine.last_day)
+    engine.update(block.index, block.to_numpy())
+    return engine
+
+
+def daily_block(frames, since=None):
+    """
+    Bloco (dias x moedas) com a última cotação de cada dia útil, sem preenchimento.
+    Os dias vêm das moedas cotadas; BRL é a constante 1.0.
+    """
+
+    series = {}
+    for c, df in frames.items():
+        if c == "BRL":
             continue
-        df = fetch_from_awesome(c, days)
-        if not df.empty:
-            series_dict[c] = df
+        s = pd.Series(df[c].to_numpy(), index=pd.DatetimeIndex(df["date"]).normalize())
+        s = s[~s.index.duplicated(keep="last")]
+        if since is not None:
+            s = s[s.index >= since]
+        series[c] = s
+
+    block = pd.DataFrame(series).sort_index()
+    if "BRL" in frames:
+        block["BRL"] = 1.0
+    return block.reindex(columns=list(frames))
+
+
+def get_correlation_matrix(currencies, period="90 dias", use_returns=False):
+    """Matriz de correlação do período (níveis ou retornos), mantida de forma incremental"""
+
+    engine = get_correlation_engine(currencies, window=period_days(period), use_returns=use_returns, period=period)
+    return engine.matrix() if engine is not None else None
+
+
+def get_rolling_correlation(currencies, a, b, period="90 dias", use_returns=False):
+    """Correlação móvel (ROLLING_CORRELATION_WINDOW dias) entre duas moedas no período"""
+
+    engine = get_correlation_engine(currencies, window=ROLLING_CORRELATION_WINDOW, use_returns=use_returns, period=period)
+    if engine is None or a not in engine.columns or b not in engine.columns:
+        return pd.DataFrame(columns=["date", "correlation"])
+    return engine.pair_series(a, b).iloc[-period_days(period):]
+
+
+def fetch_many(func, args_list, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Executa `func(*args)` para cada item de `args_list` usando um pool de threads
+    e devolve os resultados na mesma ordem da entrada.
+    """
+
+    if max_workers <= 1 or len(args_list) <= 1:
+        return [func(*args) for args in args_list]
 
-    return combine_series(series_dict)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(args_list))) as executor:
+        return list(executor.map(lambda args: func(*args), args_list))
 
 
 def combine_series(data_dict):
-    """ combina todas as séries mantendo consistência """
+    """
+    Combina todas as séries mantendo consistência.
+    As datas são unidas uma única vez e cada moeda é posicionada num bloco
+    NumPy pré-alocado (datas x moedas), preenchido em seguida sem cópias extras.
+    """
 
-    # juntar todas as datas que aparecem em qualquer série
-    all_dates = None
-    for df in data_dict.values():
-        if all_dates is None:
-            all_dates = df["date"]
-        else:
-            all_dates = pd.concat([all_dates, df["date"]])
+    if not data_dict:
+        return pd.DataFrame()
 
-    all_dates = pd.DataFrame({"date": pd.to_datetime(all_dates.unique())})
-    all_dates = all_dates.sort_values("date")
+    currencies = list(data_dict.keys())
 
-    df_final = all_dates.copy()
+    # juntar todas as datas que aparecem em qualquer série (já ordenadas)
+    all_dates = np.unique(np.concatenate([
+        df["date"].to_numpy(dtype="datetime64[ns]") for df in data_dict.values()
+    ]))
 
-    # merge de cada moeda no dataframe principal
-    for currency, df in data_dict.items():
-        df_final = df_final.merge(df, on="date", how="left")
+    block = np.full((len(all_dates), len(currencies)), np.nan)
+
+    for j, (currency, df) in enumerate(data_dict.items()):
+        positions = np.searchsorted(all_dates, df["date"].to_numpy(dtype="datetime64[ns]"))
+        block[positions, j] = pd.to_numeric(df[currency], errors="coerce").to_numpy(dtype=float)
 
     # preencher buracos em feriados e finais de semana
-    df_final = df_final.ffill().bfill()
+    fill_gaps(block)
+
+    df_final = pd.DataFrame(block, columns=currencies, copy=False)
+    df_final.insert(0, "date", all_dates)
 
     return df_final
 
 
-@st.cache_data(ttl=300)
-def get_single_currency_rate(currency):
-    """Cotação atual (AwesomeAPI)"""
+def fill_gaps(block):
+    """Forward-fill seguido de back-fill, coluna a coluna, direto no bloco 2-D"""
 
-    if currency == "BRL":
-        return 1.0
+    if block.size == 0:
+        return block
+
+    rows = np.arange(block.shape[0])[:, None]
+    valid = ~np.isnan(block)
+
+    # forward-fill: índice da última linha válida até cada posição
+    last_valid = np.maximum.accumulate(np.where(valid, rows, 0), axis=0)
+    block[:] = np.take_along_axis(block, last_valid, axis=0)
+
+    # back-fill: início de cada coluna recebe o primeiro valor válido
+    first_valid = np.where(valid.any(axis=0), valid.argmax(axis=0), 0)
+    leading = rows < first_valid
+    block[leading] = np.broadcast_to(block[first_valid, np.arange(block.shape[1])], block.shape)[leading]
+
+    return block
+
+
+def get_current_rates(currencies):
+    """
+    Cotações atuais (AwesomeAPI) de várias moedas.
+    As moedas que ainda não estão em cache são buscadas juntas, numa única
+    requisição /json/last/USD-BRL,EUR-BRL,...; depois disso todas as moedas
+    já pedidas são atualizadas em lote, em segundo plano. Só moedas da
+    AwesomeAPI entram no lote (um par inválido derruba a requisição inteira);
+    as demais (ex.: só PTAX) usam o último fechamento do histórico.
+    """
+
+    requested = [c for c in dict.fromkeys(currencies) if c != "BRL"]
+    wanted = [c for c in requested if c in SUPPORTED_CURRENCIES]
+
+    with _quote_lock:
+        _tracked_quotes.update(wanted)
+
+    rates = dict(_refresher.peek(QUOTES_KEY) or {})
+    missing = [c for c in wanted if c not in rates]
+
+    if missing:
+        try:
+            fetched = load_quotes(missing)
+        except Exception:
+            fetched = {}
+        if fetched:
+            with _quote_lock:
+                merged = dict(_refresher.peek(QUOTES_KEY) or {})
+                merged.update(fetched)
+                _refresher.put(QUOTES_KEY, merged, load_tracked_quotes, QUOTE_REFRESH_INTERVAL, REFRESH_JITTER)
+            rates.update(fetched)
 
-    url = f"https://economia.awesomeapi.com.br/json/last/{currency}-BRL"
+    # sem cotação (fonte fora do ar): usa o último fechamento salvo localmente
+    for c in wanted:
+        if rates.get(c) is None:
+            stored = load_stored_history(c, 1)
+            if not stored.empty:
+                rates[c] = float(stored[c].iloc[-1])
+
+    # moedas fora da AwesomeAPI: último fechamento do histórico (PTAX)
+    for c in requested:
+        if c not in SUPPORTED_CURRENCIES and supports_currency(c):
+            history = fetch_from_awesome(c, MAX_WINDOW_DAYS)
+            rates[c] = float(history[c].iloc[-1]) if not history.empty else None
+
+    rates["BRL"] = 1.0
+    return {c: rates.get(c) for c in currencies}
+
+
+def load_tracked_quotes():
+    """Recarrega, numa única requisição, as cotações de todas as moedas já pedidas"""
+
+    with _quote_lock:
+        tracked = list(_tracked_quotes)
+
+    return load_quotes(tracked, refresh=True)
+
+
+def load_quotes(currencies, refresh=False):
+    """
+    Cotações de várias moedas via cache compartilhado; levanta erro se a busca falhar.
+    Com `refresh` (atualização em segundo plano), só aceita um valor recente
+    (ver shared_refresher); sem ele (o usuário está esperando), vale o prazo curto do caminho interativo.
+    """
+
+    currencies = sorted(currencies)
+    key = ("last",) + tuple(currencies)
+
+    def load():
+        rates = fetch_last_quotes(currencies, interactive=not refresh)
+        if not rates:
+            raise RuntimeError("Falha ao buscar as cotações atuais")
+        return rates
+
+    if refresh:
+        return shared_refresher(key, load, QUOTE_REFRESH_INTERVAL)()
+    return get_cache().get_or_load(key, load, QUOTE_REFRESH_INTERVAL)
+
+
+def fetch_last_quotes(currencies, interactive=False):
+    """Busca a última cotação de várias moedas em uma requisição (sem cache)"""
+
+    pairs = ",".join(f"{c}-BRL" for c in currencies)
+    url = f"https://economia.awesomeapi.com.br/json/last/{pairs}"
 
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
+        r = resilient_get(get_session(), url, **(interactive_options() if interactive else {}))
         data = r.json()
-        key = f"{currency}BRL"
-        return float(data[key]["bid"])
-    except:
-        return None
\ No newline at end of file
+    except Exception:
+        return {}
+
+    rates = {}
+    for c in currencies:
+        try:
+            rates[c] = float(data[f"{c}BRL"]["bid"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return rates
+
+
+def get_single_currency_rate(currency):
+    """Cotação atual (AwesomeAPI), servida pelo cache de cotações em lote"""
+
+    return get_current_rates([currency])[currency]
+
+
+def get_history_refreshed_at(currencies):
+    """Momento da atualização mais antiga entre os históricos das moedas (None se nenhum carregado)"""
+
+    times = [
+        _refresher.last_refreshed(("daily", c, MAX_WINDOW_DAYS))
+        for c in currencies if c != "BRL"
+    ]
+    times = [t for t in times if t is not None]
+    return min(times) if times else None
+
+
+def get_quotes_refreshed_at():
+    """Momento da última atualização das cotações atuais (None se nunca carregadas)"""
+
+    return _refresher.last_refreshed(QUOTES_KEY)
+
+
+def get_request_stats():
+    """Contadores de requisições por host (tentativas, falhas, circuito) para monitoramento"""
+
+    return get_stats()
+
+
+def get_metrics():
+    """Métricas do dashboard (etapas, caches, falhas) junto com as requisições HTTP por host"""
+
+    return perf.snapshot(get_stats())
+
+
+def clear_caches():
+    """Limpa o cache dos históricos e das cotações atuais"""
+
+    st.cache_data.clear()
+    _refresher.clear()
+    get_cache().clear()
+    with _resource_lock:
+        _correlation_engines.clear()
+        _aligned_frames.clear()
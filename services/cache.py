@@ -0,0 +1,290 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from utils import perf
+
+# Marca de "não encontrado" (None pode ser um valor válido em cache)
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """
+    Interface comum dos backends de cache (TTL + LRU limitado).
+    `get_or_load` garante uma única carga por chave entre todos os
+    leitores que compartilham o backend: quem obtém o lease chama o
+    loader, os demais esperam o valor aparecer no cache.
+    """
+
+    name = "shared_cache"     # prefixo nas métricas de acerto/falta (uma por família de chave)
+    poll_interval = 0.1
+    wait_timeout = 30.0
+
+    @abstractmethod
+    def get(self, key, min_remaining=0.0):
+        """Valor da chave ou MISSING (também se faltarem até `min_remaining` segundos para expirar)"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Grava o valor com validade de `ttl` segundos"""
+
+    @abstractmethod
+    def acquire(self, key):
+        """Tenta obter o lease de carga da chave (não bloqueante)"""
+
+    @abstractmethod
+    def release(self, key):
+        """Libera o lease de carga da chave"""
+
+    @abstractmethod
+    def clear(self):
+        """Remove todas as entradas"""
+
+    def metric_name(self, key):
+        """Nome nas métricas: o prefixo + a família da chave (seu primeiro elemento, ex.: "daily")"""
+        family = key[0] if isinstance(key, tuple) and key else key
+        return f"{self.name}:{family}"
+
+    def get_or_load(self, key, loader, ttl, min_remaining=0.0):
+        """
+        Retorna o valor em cache ou chama `loader()` (uma vez por chave) e grava o resultado.
+        Com `min_remaining`, só vale um valor gravado há no máximo `ttl - min_remaining` segundos.
+        """
+        metric = self.metric_name(key)
+        value = self.get(key, min_remaining)
+        if value is not MISSING:
+            perf.cache_event(metric, hit=True)
+            return value
+
+        deadline = time.monotonic() + self.wait_timeout
+        while not self.acquire(key):
+            time.sleep(self.poll_interval)
+            value = self.get(key, min_remaining)
+            if value is not MISSING:
+                perf.cache_event(metric, hit=True)
+                return value
+            if time.monotonic() > deadline:
+                # o dono do lease travou: carrega por conta própria
+                perf.cache_event(metric, hit=False)
+                return loader()
+
+        try:
+            # outro leitor pode ter gravado enquanto esperávamos o lease
+            value = self.get(key, min_remaining)
+            if value is MISSING:
+                perf.cache_event(metric, hit=False)
+                value = loader()
+                self.set(key, value, ttl)
+            else:
+                perf.cache_event(metric, hit=True)
+            return value
+        finally:
+            self.release(key)
+
+
+class MemoryCache(CacheBackend):
+    """Cache em memória do processo, com TTL e LRU por número de entradas"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._loading = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, min_remaining=0.0):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            value, expires_at = item
+            now = time.time()
+            if now >= expires_at:
+                del self._data[key]
+                return MISSING
+            if now + min_remaining >= expires_at:
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def acquire(self, key):
+        with self._lock:
+            if key in self._loading:
+                return False
+            self._loading.add(key)
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._loading.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache em disco compartilhado entre processos (SQLite em modo WAL).
+    Os valores são serializados com pickle; cada escrita é uma transação
+    atômica e, quando o total passa de `max_bytes`, as entradas menos
+    usadas recentemente são removidas. O lease de carga também fica no
+    banco, então N processos fazem uma única busca por chave. Leituras não
+    escrevem: o último acesso de cada chave fica em memória e é gravado em
+    lote a cada `touch_interval` segundos (ou junto da próxima escrita).
+    """
+
+    def __init__(self, filepath, max_bytes=256 * 1024 * 1024, lease_timeout=30.0, touch_interval=30.0):
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.lease_timeout = lease_timeout
+        self.wait_timeout = lease_timeout
+        self.touch_interval = touch_interval
+        self._touched = {}      # chave -> último acesso ainda não gravado
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filepath, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (last_access)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _owner(self):
+        """Identifica o dono do lease (processo + thread)"""
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def get(self, key, min_remaining=0.0):
+        key = repr(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, now + min_remaining)
+            ).fetchone()
+            if row is None:
+                return MISSING
+            self._touched[key] = now
+            if time.monotonic() - self._last_flush >= self.touch_interval:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._flush_touches()
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        return pickle.loads(row[0])
+
+    def _flush_touches(self):
+        """Grava os últimos acessos pendentes (chamado dentro de uma transação)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+        self._last_flush = time.monotonic()
+
+    def set(self, key, value, ttl):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                    (repr(key), sqlite3.Binary(blob), len(blob), now + ttl, now),
+                )
+                self._touched.pop(repr(key), None)
+                self._flush_touches()
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now):
+        """Remove expirados e, se ainda passar do limite, os menos usados (LRU)"""
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY last_access").fetchall():
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def acquire(self, key):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT owner, expires_at FROM leases WHERE key = ?", (repr(key),)
+                ).fetchone()
+                if row is not None and row[1] > now and row[0] != self._owner():
+                    self._conn.execute("COMMIT")
+                    return False
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO leases VALUES (?, ?, ?)",
+                    (repr(key), self._owner(), now + self.lease_timeout),
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def release(self, key):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM leases WHERE key = ? AND owner = ?", (repr(key), self._owner())
+            )
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM cache")
+
+
+def make_cache(backend="memory", **options):
+    """Cria o backend de cache pelo nome ("memory" ou "sqlite")"""
+
+    if backend == "memory":
+        return MemoryCache(**options)
+    if backend == "sqlite":
+        return SQLiteCache(**options)
+    raise ValueError(f"Backend de cache desconhecido: {backend}")
@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.api.currency_api import CurrencyAPI
+from src.processing.data_cleaner import DataCleaner, to_float64
+
+# Tempo (s) de espera pelo provedor principal antes de disparar o seguinte
+HEDGE_AFTER = 2.0
+
+# Threads para as requisições (as perdedoras terminam em segundo plano)
+HEDGE_MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="provider")
+
+
+def normalize_series(dates, values, currency):
+    """Esquema comum de todos os provedores: colunas `date` e `<moeda>`, ordenado por data"""
+
+    df = pd.DataFrame({
+        "date": pd.to_datetime(dates),
+        currency: pd.to_numeric(values, errors="coerce"),
+    })
+    return df.dropna().sort_values("date").reset_index(drop=True)
+
+
+class Provider:
+    """Fonte de histórico diário de cotações contra o BRL"""
+
+    name = "base"
+
+    def supports(self, currency):
+        return True
+
+    def fetch(self, currency, days, **options):
+        """Últimos `days` registros diários no esquema de normalize_series (`options` vão para a fonte)"""
+        raise NotImplementedError
+
+
+class FunctionProvider(Provider):
+    """Provedor a partir de uma função `load(currency, days)` que já devolve o esquema comum"""
+
+    def __init__(self, name, load, currencies=None):
+        self.name = name
+        self.load = load
+        self.currencies = set(currencies) if currencies is not None else None
+
+    def supports(self, currency):
+        return self.currencies is None or currency in self.currencies
+
+    def fetch(self, currency, days, **options):
+        return self.load(currency, days, **options)
+
+
+class PtaxProvider(Provider):
+    """Boletim de fechamento PTAX (BCB) por dia, via CurrencyAPI.fetch_range"""
+
+    name = "ptax"
+
+    def __init__(self, api=None):
+        self.api = api
+        self._lock = threading.Lock()
+
+    def get_api(self):
+        with self._lock:
+            if self.api is None:
+                self.api = CurrencyAPI()
+            return self.api
+
+    def available(self):
+        """Moedas com cotação PTAX"""
+        return [c["simbolo"] for c in self.get_api().get_available_currencies()]
+
+    def supports(self, currency):
+        return currency in self.available()
+
+    def fetch(self, currency, days, **options):
+        # `days` registros são dias úteis: busca uma janela corrida com folga para fins de semana e feriados
+        end = datetime.now()
+        start = end - timedelta(days=int(days * 7 / 5) + 10)
+        records = self.get_api().iter_range(currency, start.strftime("%m-%d-%Y"), end.strftime("%m-%d-%Y"))
+
+        daily = DataCleaner(records).clean_and_transform()
+        if daily.empty:
+            return pd.DataFrame(columns=["date", currency])
+
+        # cotação de compra, como o "bid" da AwesomeAPI (float64, como os demais provedores)
+        return normalize_series(daily["dataHoraCotacao"], to_float64(daily["cotacaoCompra"]), currency).iloc[-days:].reset_index(drop=True)
+
+
+def hedged_fetch(providers, currency, days, hedge_after=HEDGE_AFTER, **options):
+    """
+    Requisição com hedge: dispara o primeiro provedor e, se ele não responder
+    em `hedge_after` segundos (ou falhar), dispara o próximo; vence a primeira
+    resposta não vazia. `options` são repassadas a cada `fetch`.
+    Retorna (DataFrame, nome do provedor).
+    """
+
+    queue = [p for p in providers if p.supports(currency)]
+    if not queue:
+        raise ValueError(f"Nenhum provedor disponível para {currency}")
+
+    pending = {}
+    errors = []
+
+    while queue or pending:
+        if queue:
+            provider = queue.pop(0)
+            pending[_executor.submit(provider.fetch, currency, days, **options)] = provider
+
+        # com provedores na fila, espera só até o limiar do hedge
+        done, _ = wait(pending, timeout=hedge_after if queue else None, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            provider = pending.pop(future)
+            try:
+                df = future.result()
+            except Exception as e:
+                errors.append(f"{provider.name}: {e}")
+                continue
+            if not df.empty:
+                return df, provider.name
+            errors.append(f"{provider.name}: sem dados")
+
+    raise RuntimeError(f"Todos os provedores falharam para {currency} ({'; '.join(errors)})")
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils import perf
+
+
+class _Entry:
+    """Valor em cache e agenda de atualização de uma chave"""
+
+    def __init__(self, loader, interval, jitter):
+        self.loader = loader
+        self.interval = interval
+        self.jitter = jitter
+        self.value = None
+        self.refreshed_at = None
+        self.next_refresh = 0.0
+        self.last_read = time.monotonic()
+        self.refreshing = False
+
+    def schedule(self):
+        """Agenda a próxima atualização com jitter (evita rajadas simultâneas)"""
+        spread = self.interval * self.jitter
+        self.next_refresh = time.monotonic() + self.interval + random.uniform(-spread, spread)
+
+
+class BackgroundRefresher:
+    """
+    Cache stale-while-revalidate: cada chave é recarregada por uma thread
+    de fundo um pouco antes de expirar. Leitores sempre recebem o último
+    valor válido na hora; só a primeira leitura de uma chave espera o loader.
+    Se uma atualização falhar (exceção no loader), o valor antigo é mantido.
+    """
+
+    def __init__(self, tick=1.0, idle_timeout=7200, max_workers=4):
+        self.tick = tick
+        self.idle_timeout = idle_timeout
+        self.max_workers = max_workers
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._executor = None
+
+    def get(self, key, loader, interval, jitter=0.1, refresh=None):
+        """
+        Retorna o valor da chave, carregando-o de forma síncrona só na primeira vez.
+        `refresh` (padrão: o próprio `loader`) é usado nas atualizações em segundo plano.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refreshed_at is not None:
+                entry.last_read = time.monotonic()
+                perf.cache_event("refresher", hit=True)
+                return entry.value
+
+        perf.cache_event("refresher", hit=False)
+        value = loader()
+        self.put(key, value, refresh or loader, interval, jitter)
+        return value
+
+    def peek(self, key):
+        """Último valor da chave (None se nunca carregada), sem disparar carga"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.last_read = time.monotonic()
+            return entry.value
+
+    def put(self, key, value, loader, interval, jitter=0.1):
+        """Grava um valor já carregado e passa a atualizá-lo em segundo plano"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(loader, interval, jitter)
+            entry.value = value
+            entry.refreshed_at = datetime.now()
+            entry.last_read = time.monotonic()
+            entry.schedule()
+        self._ensure_started()
+
+    def last_refreshed(self, key):
+        """Momento da última carga bem-sucedida da chave (None se nunca carregada)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refreshed_at if entry is not None else None
+
+    def clear(self):
+        """Descarta todos os valores; a próxima leitura de cada chave volta a ser síncrona"""
+        with self._lock:
+            self._entries.clear()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresher")
+            self._thread = threading.Thread(target=self._run, name="background-refresher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                for key, entry in list(self._entries.items()):
+                    if now - entry.last_read > self.idle_timeout:
+                        # ninguém lê esta chave há muito tempo: para de atualizá-la
+                        del self._entries[key]
+                    elif not entry.refreshing and now >= entry.next_refresh:
+                        entry.refreshing = True
+                        due.append((key, entry))
+            for key, entry in due:
+                self._executor.submit(self._refresh, key, entry)
+
+    def _refresh(self, key, entry):
+        try:
+            value = entry.loader()
+        except Exception:
+            value = None
+            failed = True
+        else:
+            failed = False
+
+        with self._lock:
+            entry.refreshing = False
+            if failed:
+                # mantém o último valor válido e tenta de novo no próximo ciclo
+                entry.schedule()
+                return
+            entry.value = value
+            entry.refreshed_at = datetime.now()
+            entry.schedule()
@@ -1,7 +1,18 @@
 import requests
 import pandas as pd
 import json
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Iterator, Tuple
+
+from .resilience import resilient_get
+
+# Paginação de períodos longos (fetch_range)
+RANGE_WINDOW_DAYS = 180     # tamanho de cada janela de datas
+RANGE_PAGE_SIZE = 1000      # registros por página ($top)
+RANGE_MAX_WORKERS = 4       # janelas buscadas em paralelo
 
 class CurrencyAPI:
     """
@@ -20,9 +31,15 @@ class CurrencyAPI:
     https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata/CotacaoMoedaPeriodo(moeda=@moeda,dataInicial=@dataInicial,dataFinalCotacao=@dataFinalCotacao)?@moeda='EUR'&@dataInicial='10-01-2025'&@dataFinalCotacao='11-18-2025'&$top=100&$format=json&$select=paridadeCompra,paridadeVenda,cotacaoCompra,cotacaoVenda,dataHoraCotacao,tipoBoletim
     """
     
-    def __init__(self, api_url: str = "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata"):
-        """Inicializa a classe com a URL base da API (placeholder)."""
+    def __init__(self, api_url: str = "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata", max_workers: int = RANGE_MAX_WORKERS):
+        """Inicializa a classe com a URL base da API e uma sessão HTTP compartilhada."""
         self.api_url = api_url
+        self.max_workers = max_workers
+        # conexões reaproveitadas (keep-alive) entre páginas e threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         print(f"CurrencyAPI inicializada para URL: {self.api_url}")
 
     def fetch_data(self, currency: str, start_date: str, end_date: str, page: int = 1, limit: int = 100) -> Dict[str, Any]:
@@ -48,8 +65,8 @@ class CurrencyAPI:
                     '$select': 'paridadeCompra,paridadeVenda,cotacaoCompra,cotacaoVenda,dataHoraCotacao,tipoBoletim'
                 }
         try:
-            response = requests.get(url_path, params=params, timeout=10)
-            response.raise_for_status()
+            # timeouts de conexão/leitura, novas tentativas e circuit breaker por host
+            response = resilient_get(self.session, url_path, params=params)
         except requests.exceptions.HTTPError as http_err:
             # Captura erros 4xx/5xx (erros na API)
             # Garante que response existe antes de acessar atributos
@@ -73,6 +90,54 @@ class CurrencyAPI:
             # Re-raise com contexto para facilitar debug
             raise RuntimeError(f"Falha ao decodificar JSON (status {response.status_code}). Conteúdo foi impresso no stdout.") from json_err
 
+    def split_range(self, start_date: str, end_date: str, window_days: int = RANGE_WINDOW_DAYS) -> List[Tuple[str, str]]:
+        """Divide o período (MM-DD-AAAA) em janelas consecutivas de até `window_days` dias."""
+        if(not self.validate_date_format(start_date) or not self.validate_date_format(end_date)):
+            raise ValueError("Formato de data inválido. Use MM-DD-AAAA.")
+        start = pd.to_datetime(start_date, format='%m-%d-%Y')
+        end = pd.to_datetime(end_date, format='%m-%d-%Y')
+
+        windows = []
+        while start <= end:
+            window_end = min(start + timedelta(days=window_days - 1), end)
+            windows.append((start.strftime('%m-%d-%Y'), window_end.strftime('%m-%d-%Y')))
+            start = window_end + timedelta(days=1)
+        return windows
+
+    def fetch_window(self, currency: str, start_date: str, end_date: str, limit: int = RANGE_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """Busca todas as páginas de uma janela de datas (até uma página vir incompleta)."""
+        records = []
+        page = 1
+        while True:
+            rows = self.fetch_data(currency, start_date, end_date, page=page, limit=limit).get("value", [])
+            records.extend(rows)
+            if len(rows) < limit:
+                return records
+            page += 1
+
+    def iter_range(self, currency: str, start_date: str, end_date: str, window_days: int = RANGE_WINDOW_DAYS, limit: int = RANGE_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Gera os registros de um período longo em ordem cronológica. As janelas
+        são buscadas em paralelo (no máximo `max_workers` por vez, com a sessão
+        compartilhada) e no máximo 2x esse número fica em memória aguardando consumo.
+        """
+        windows = self.split_range(start_date, end_date, window_days)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for window in windows:
+                pending.append(executor.submit(self.fetch_window, currency, *window, limit))
+                if len(pending) >= 2 * self.max_workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def fetch_range(self, currency: str, start_date: str, end_date: str, window_days: int = RANGE_WINDOW_DAYS, limit: int = RANGE_PAGE_SIZE) -> pd.DataFrame:
+        """Todos os registros do período em um único DataFrame (ver iter_range)."""
+        return pd.DataFrame.from_records(
+            self.iter_range(currency, start_date, end_date, window_days, limit),
+            columns=['paridadeCompra', 'paridadeVenda', 'cotacaoCompra', 'cotacaoVenda', 'dataHoraCotacao', 'tipoBoletim']
+        )
+
     def get_available_currencies(self) -> List[Dict[str, str]]:
         """Essa Rota é fixa na API e não muda com frequencia,
         pra esse trabalho vamos deixar hardcoded.
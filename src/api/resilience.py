@@ -0,0 +1,215 @@
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+# Timeouts separados: conexão (falha rápido se o host não responde) e leitura
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+
+# Caminho interativo (primeira renderização): leitura curta e prazo total por chamada,
+# para o usuário ver o erro (ou o dado salvo) em segundos; o resto (atualização em
+# segundo plano, backfill) usa os valores acima e todas as tentativas
+INTERACTIVE_READ_TIMEOUT = 4.0
+INTERACTIVE_DEADLINE = 6.0
+
+# Tentativas por requisição e backoff exponencial com jitter ("full jitter")
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2.0
+
+# Circuit breaker por host: abre após N falhas seguidas e testa de novo após o intervalo
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+# Status HTTP que valem nova tentativa (os demais 4xx são erro do cliente)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """O circuito do host está aberto: a requisição nem é enviada."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um host. Fechado: requisições normais. Aberto (após
+    `failure_threshold` falhas seguidas): falha imediatamente durante
+    `reset_timeout` segundos. Meio-aberto: deixa passar uma requisição de
+    teste; sucesso fecha o circuito, falha o reabre.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """True se a requisição pode ser enviada agora"""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def release_probe(self) -> None:
+        """Libera a requisição de teste sem mudar o estado (erro que não diz nada sobre o host)"""
+        with self._lock:
+            self.probing = False
+
+
+class RateLimiter:
+    """Limita o ritmo de requisições (no máximo `rate` inícios por segundo), compartilhado entre threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloqueia até o próximo horário livre"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_counters: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Circuit breaker compartilhado do host"""
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def count(host: str, name: str, amount: float = 1) -> None:
+    with _lock:
+        counters = _counters.setdefault(host, {"requests": 0, "successes": 0, "failures": 0, "retries": 0,
+                                               "short_circuits": 0, "seconds": 0.0, "max_seconds": 0.0})
+        if name == "seconds":
+            counters["max_seconds"] = max(counters["max_seconds"], amount)
+        counters[name] += amount
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """Contadores e estado do circuito por host (para monitoramento)"""
+    with _lock:
+        snapshot = {host: dict(values) for host, values in _counters.items()}
+        breakers = dict(_breakers)
+    for host, breaker in breakers.items():
+        snapshot.setdefault(host, {})["circuit"] = breaker.state
+    return snapshot
+
+
+def interactive_options() -> Dict[str, Any]:
+    """Argumentos de resilient_get para o caminho interativo (ver INTERACTIVE_DEADLINE)"""
+    return {"timeout": (CONNECT_TIMEOUT, INTERACTIVE_READ_TIMEOUT), "deadline": INTERACTIVE_DEADLINE}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Espera antes da tentativa `attempt` + 1: uniforme entre 0 e base * 2^attempt (limitado)"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, requests.exceptions.HTTPError):
+        return getattr(error.response, "status_code", None) in RETRY_STATUS
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def resilient_get(session: requests.Session, url: str, params: Optional[Dict[str, Any]] = None,
+                  timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+                  attempts: int = MAX_ATTEMPTS, deadline: Optional[float] = None) -> requests.Response:
+    """
+    GET com timeouts de conexão/leitura separados, novas tentativas com
+    backoff para erros transitórios e circuit breaker por host. Com o
+    circuito aberto, levanta CircuitOpenError sem fazer a requisição.
+    `deadline` (segundos) limita a chamada inteira: os timeouts de cada
+    tentativa encolhem para o tempo restante e não há nova tentativa
+    depois de esgotado.
+    """
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+    expires = time.monotonic() + deadline if deadline is not None else None
+
+    for attempt in range(attempts):
+        if not breaker.allow():
+            count(host, "short_circuits")
+            raise CircuitOpenError(f"Circuito aberto para {host}: falhando rápido")
+
+        attempt_timeout = timeout
+        if expires is not None:
+            remaining = max(expires - time.monotonic(), 0.1)
+            attempt_timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+
+        count(host, "requests")
+        start = time.perf_counter()
+        try:
+            try:
+                response = session.get(url, params=params, timeout=attempt_timeout)
+            finally:
+                count(host, "seconds", time.perf_counter() - start)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            count(host, "failures")
+            if not is_retryable(e):
+                # o host respondeu (ex.: 404): não conta para o circuito
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            delay = backoff_delay(attempt)
+            if expires is not None and time.monotonic() + delay >= expires:
+                raise
+            count(host, "retries")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # erro fora da rede (ex.: na sessão ou interrupção): não prende o circuito meio-aberto
+            breaker.release_probe()
+            raise
+
+        count(host, "successes")
+        breaker.record_success()
+        return response
@@ -38,9 +38,9 @@ def initialize_project_modules():
     a cada interação do Streamlit.
     """
     try:
-        # 3.1. Inicializa a abstração de Banco de Dados (DB com JSON)
+        # 3.1. Inicializa a abstração de Banco de Dados (DB com SQLite)
         db_instance = DB()
-        st.success("✔ Módulo DB (JSON) inicializado com sucesso.")
+        st.success("✔ Módulo DB (SQLite) inicializado com sucesso.")
 
         # 3.2. Inicializa a API de Moedas
         api_instance = CurrencyAPI(api_url="Placeholder API URL")
@@ -102,7 +102,7 @@ def main_dashboard():
 
         st.markdown("---")
         st.subheader("Status do Setup")
-        st.write(f"DB Records: {len(db.get_all())}")
+        st.write(f"DB Records: {db.count()}")
         st.write(f"API URL: {currency_api.api_url}")
         
     # 4.2. CORPO PRINCIPAL DO DASHBOARD
@@ -135,7 +135,7 @@ def main_dashboard():
         st.write("Gráfico de Dispersão/Comparação de Pares irá aqui.")
 
     with col3:
-        st.metric(label="Registros no DB", value=str(len(db.get_all())) if db else "0")
+        st.metric(label="Registros no DB", value=str(db.count()) if db else "0")
         st.write("Elementos Interativos de Filtro estão na Barra Lateral.")
         
 # Execução da função principal
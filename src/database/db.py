@@ -2,50 +2,223 @@
 
 import json
 import os
-from typing import Dict, Any, List
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+import pandas as pd
+
+# Formato usado para armazenar as datas (ordenável lexicograficamente)
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Colunas fixas da tabela; os demais campos de um registro vão para `payload` (JSON)
+BASE_FIELDS = ('currency', 'date', 'value')
+
 
 class DB:
     """
     Classe de abstração de banco de dados (Repository Pattern).
-    Inicialmente, usa arquivos JSON para persistência local,
-    facilitando a migração futura para um DB real (SQLite, NoSQL, etc.).
+    Persiste os registros em SQLite, numa tabela particionada por moeda:
+    a chave primária (currency, date) em uma tabela WITHOUT ROWID mantém
+    os registros de cada moeda contíguos e ordenados por data, então
+    inserções são incrementais e consultas por intervalo leem só o trecho necessário.
+
+    Cada registro precisa ter as chaves 'currency' e 'date' (registros sem elas,
+    ou com data inválida, são ignorados com um aviso); 'value' é opcional e
+    qualquer outro campo é preservado em JSON.
     """
 
-    def __init__(self, filepath: str = 'data/processed/exchange_data.json'):
+    def __init__(self, filepath: str = 'data/processed/exchange_data.db'):
         """
         Inicializa a classe e define o caminho do arquivo de armazenamento.
+        Se existir o antigo arquivo JSON, ele é migrado automaticamente.
         """
-        self.filepath = filepath
-        self.data: List[Dict[str, Any]] = self._load_data()
-        print(f"DB inicializado. Carregou {len(self.data)} registros de {self.filepath}")
-
-    def _load_data(self) -> List[Dict[str, Any]]:
-        """Carrega os dados do arquivo JSON."""
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    # Garantindo que o arquivo não está vazio ou corrompido
-                    content = f.read()
-                    return json.loads(content) if content else []
-            except json.JSONDecodeError:
-                print(f"Aviso: Arquivo {self.filepath} corrompido ou JSON inválido. Reiniciando com dados vazios.")
-                return []
-        return []
-
-    def _save_data(self) -> None:
-        """Salva os dados atuais em memória para o arquivo JSON."""
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4)
-        print(f"Dados salvos em {self.filepath}.")
+        base, ext = os.path.splitext(filepath)
+        self.filepath = base + '.db' if ext == '.json' else filepath
+        self.legacy_filepath = base + '.json'
+
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                currency TEXT NOT NULL,
+                date TEXT NOT NULL,
+                value REAL,
+                payload TEXT,
+                PRIMARY KEY (currency, date)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+        self._migrate_legacy_json()
+        print(f"DB inicializado. {self.count()} registros em {self.filepath}")
+
+    def _migrate_legacy_json(self) -> None:
+        """Importa o antigo exchange_data.json (lista de dicts) e o renomeia para .migrated."""
+        if not os.path.exists(self.legacy_filepath):
+            return
+        try:
+            with open(self.legacy_filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+                records = json.loads(content) if content else []
+        except json.JSONDecodeError:
+            print(f"Aviso: Arquivo {self.legacy_filepath} corrompido ou JSON inválido. Migração ignorada.")
+            return
+
+        valid = [r for r in records if isinstance(r, dict) and 'currency' in r and 'date' in r]
+        if len(valid) < len(records):
+            print(f"Aviso: {len(records) - len(valid)} registros sem 'currency'/'date' foram ignorados na migração.")
+
+        self.insert_many(valid)
+        os.replace(self.legacy_filepath, self.legacy_filepath + '.migrated')
+        print(f"Migrados {len(valid)} registros de {self.legacy_filepath}.")
 
     def insert(self, record: Dict[str, Any]) -> None:
-        """Insere um novo registro de dados de conversão."""
-        self.data.append(record)
-        self._save_data()
+        """Insere (ou substitui) um registro de dados de conversão."""
+        self.insert_many([record])
+
+    def insert_many(self, records: Union[Iterable[Dict[str, Any]], pd.DataFrame]) -> int:
+        """
+        Insere vários registros em uma única transação.
+        Aceita uma lista de dicts ou um DataFrame com colunas 'currency' e 'date'.
+        Registros com a mesma (currency, date) são substituídos. Retorna quantos foram gravados.
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        if df.empty:
+            return 0
+
+        rows = self._rows(df)
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def replace_from(self, currency: str, start: Any, records: Union[Iterable[Dict[str, Any]], pd.DataFrame]) -> int:
+        """
+        Substitui os registros de uma moeda a partir de `start` pelos novos,
+        removendo e inserindo na mesma transação (leitores nunca veem a cauda vazia).
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        rows = self._rows(df) if not df.empty else []
+        where, params = self._range_filter(currency, start, None)
+
+        with self._lock, self._conn:
+            self._conn.execute(f'DELETE FROM records WHERE {where}', params)
+            self._conn.executemany('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+
+    @staticmethod
+    def _rows(df: pd.DataFrame) -> List[tuple]:
+        """
+        Converte um DataFrame de registros nas tuplas (currency, date, value, payload) da tabela.
+        Registros sem 'currency'/'date' (ou com data inválida) são ignorados, como o
+        antigo armazenamento JSON os aceitava sem erro; a quantidade é avisada.
+        """
+        currencies = df['currency'] if 'currency' in df.columns else pd.Series(None, index=df.index, dtype=object)
+        dates = pd.to_datetime(df['date'], errors='coerce', format='mixed') if 'date' in df.columns else pd.Series(pd.NaT, index=df.index)
+        valid = currencies.notna() & dates.notna()
+        if not valid.all():
+            print(f"Aviso: {int((~valid).sum())} registros sem 'currency'/'date' válidos foram ignorados.")
+            df, currencies, dates = df[valid], currencies[valid], dates[valid]
+
+        dates = dates.dt.strftime(DATE_FORMAT)
+        values = pd.to_numeric(df['value'], errors='coerce') if 'value' in df.columns else pd.Series(float('nan'), index=df.index)
+        values = values.astype(object).where(values.notna(), None)
+
+        extra = [c for c in df.columns if c not in BASE_FIELDS]
+        if extra:
+            payloads = [json.dumps(row, ensure_ascii=False, default=str) for row in df[extra].to_dict('records')]
+        else:
+            payloads = [None] * len(df)
+
+        return list(zip(currencies.astype(str), dates, values, payloads))
+
+    @staticmethod
+    def _range_filter(currency: str, start: Optional[Any], end: Optional[Any]):
+        """Monta a cláusula WHERE (e parâmetros) de um intervalo de datas de uma moeda."""
+        where = 'currency = ?'
+        params: List[Any] = [currency]
+        if start is not None:
+            where += ' AND date >= ?'
+            params.append(pd.Timestamp(start).strftime(DATE_FORMAT))
+        if end is not None:
+            where += ' AND date <= ?'
+            params.append(pd.Timestamp(end).strftime(DATE_FORMAT))
+        return where, params
+
+    def read_range(self, currency: str, start: Optional[Any] = None, end: Optional[Any] = None) -> pd.DataFrame:
+        """Retorna os registros de uma moeda entre `start` e `end` (inclusivos) como DataFrame (date, value)."""
+        where, params = self._range_filter(currency, start, end)
+        query = f'SELECT date, value FROM records WHERE {where} ORDER BY date'
+
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
+        df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT)
+        return df
+
+    def read_last(self, currency: str, n: int) -> pd.DataFrame:
+        """Retorna os `n` registros mais recentes de uma moeda, em ordem cronológica."""
+        query = 'SELECT date, value FROM (SELECT date, value FROM records WHERE currency = ? ORDER BY date DESC LIMIT ?) ORDER BY date'
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=[currency, int(n)])
+        df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT)
+        return df
+
+    def get_last_date(self, currency: str) -> Optional[pd.Timestamp]:
+        """Data do registro mais recente de uma moeda (None se não houver)."""
+        with self._lock:
+            row = self._conn.execute('SELECT MAX(date) FROM records WHERE currency = ?', (currency,)).fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
+
+    def get_first_date(self, currency: str) -> Optional[pd.Timestamp]:
+        """Data do registro mais antigo de uma moeda (None se não houver)."""
+        with self._lock:
+            row = self._conn.execute('SELECT MIN(date) FROM records WHERE currency = ?', (currency,)).fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
+
+    def delete_range(self, currency: str, start: Optional[Any] = None, end: Optional[Any] = None) -> int:
+        """Remove os registros de uma moeda entre `start` e `end` (inclusivos)."""
+        where, params = self._range_filter(currency, start, end)
+        with self._lock:
+            deleted = self._conn.execute(f'DELETE FROM records WHERE {where}', params).rowcount
+            self._conn.commit()
+        return deleted
+
+    def get_currencies(self) -> List[str]:
+        """Lista as moedas que possuem registros."""
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT currency FROM records ORDER BY currency').fetchall()
+        return [r[0] for r in rows]
+
+    def count(self, currency: Optional[str] = None) -> int:
+        """Número de registros armazenados (total ou de uma moeda)."""
+        with self._lock:
+            if currency is None:
+                return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM records WHERE currency = ?', (currency,)).fetchone()[0]
 
     def get_all(self) -> List[Dict[str, Any]]:
         """Retorna todos os registros armazenados."""
-        return self.data
+        with self._lock:
+            rows = self._conn.execute('SELECT currency, date, value, payload FROM records ORDER BY currency, date').fetchall()
+        records = []
+        for currency, date, value, payload in rows:
+            record = {'currency': currency, 'date': date, 'value': value}
+            if payload:
+                record.update(json.loads(payload))
+            records.append(record)
+        return records
+
+    def close(self) -> None:
+        """Fecha a conexão com o arquivo SQLite."""
+        with self._lock:
+            self._conn.close()
 
     # Outras funções CRUD (update, delete) podem ser adicionadas futuramente.
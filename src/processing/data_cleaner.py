@@ -1,18 +1,52 @@
 # src/processing/data_cleaner.py
 
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Iterable, Dict, Any
+
+# Formato de dataHoraCotacao na API PTAX (ex.: "2023-01-02 13:09:27.253"; a fração
+# de segundo nem sempre vem, então aceita qualquer variante ISO 8601)
+PTAX_DATETIME_FORMAT = "ISO8601"
+
+# Tipos de boletim, do menos ao mais prioritário (o fechamento vence no dia)
+BULLETIN_TYPES = ["Abertura", "Intermediário", "Fechamento PTAX", "Fechamento"]
+
+PRICE_COLUMNS = ["cotacaoCompra", "cotacaoVenda", "paridadeCompra", "paridadeVenda"]
+
+# Registros processados por vez quando os dados chegam como fluxo (gerador)
+CHUNK_SIZE = 100_000
+
+# Dígitos significativos confiáveis em float32; as cotações PTAX têm no máximo 4 casas
+# decimais (menos de 7 dígitos), então arredondar a 7 dígitos recupera o valor publicado
+FLOAT32_SIGNIFICANT_DIGITS = 7
+
+
+def to_float64(values: pd.Series, digits: int = FLOAT32_SIGNIFICANT_DIGITS) -> pd.Series:
+    """Cotações float32 em float64, arredondadas a `digits` dígitos significativos (sem o ruído do float32)."""
+    values = values.astype("float64")
+    magnitude = np.floor(np.log10(values.abs().where(values != 0)))
+    scale = 10.0 ** (digits - 1 - magnitude.fillna(0))
+    return (values * scale).round() / scale
+
 
 class DataCleaner:
     """
     Classe responsável pela limpeza, transformação e agregação de dados.
     Esta classe aplica os requisitos de processamento de dados do projeto.
+
+    `raw_data` pode ser uma lista de registros PTAX ou qualquer iterável
+    (ex.: CurrencyAPI.iter_range): os registros são consumidos em blocos de
+    `chunk_size`, e cada bloco é reduzido a um boletim por dia antes do
+    próximo, mantendo a memória limitada.
     """
 
-    def __init__(self, raw_data: List[Dict[str, Any]]):
-        """Inicializa com a lista de dados brutos para processamento."""
+    def __init__(self, raw_data: Iterable[Dict[str, Any]], chunk_size: int = CHUNK_SIZE):
+        """Inicializa com os dados brutos (lista ou fluxo de registros) para processamento."""
         self.raw_data = raw_data
-        print(f"DataCleaner inicializado com {len(raw_data)} itens para processar.")
+        self.chunk_size = chunk_size
+        size = len(raw_data) if hasattr(raw_data, "__len__") else "um fluxo de"
+        print(f"DataCleaner inicializado com {size} itens para processar.")
         self.df: pd.DataFrame = pd.DataFrame()
 
     def load_to_dataframe(self) -> pd.DataFrame:
@@ -20,29 +54,69 @@ class DataCleaner:
         if not self.raw_data:
             print("Nenhum dado bruto para carregar.")
             return pd.DataFrame()
-            
+
         self.df = pd.DataFrame(self.raw_data)
         return self.df
 
+    def iter_chunks(self) -> Iterable[pd.DataFrame]:
+        """Gera DataFrames de até `chunk_size` registros a partir dos dados brutos."""
+        records = iter(self.raw_data)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                return
+            yield pd.DataFrame.from_records(chunk)
+
+    def normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tipos compactos: data/hora em um único to_datetime (ISO 8601),
+        tipoBoletim categórico e cotações/paridades em float32 (quem grava ou
+        exporta converte com to_float64). Linhas sem data ou sem cotação de
+        venda são descartadas e contadas.
+        """
+        out = pd.DataFrame({
+            "dataHoraCotacao": pd.to_datetime(df["dataHoraCotacao"], format=PTAX_DATETIME_FORMAT, errors="coerce"),
+            "tipoBoletim": pd.Categorical(df.get("tipoBoletim", pd.Series(None, index=df.index, dtype=object)), categories=BULLETIN_TYPES, ordered=True),
+        })
+        for col in PRICE_COLUMNS:
+            values = df[col] if col in df.columns else pd.Series(float("nan"), index=df.index)
+            out[col] = pd.to_numeric(values, errors="coerce").astype("float32")
+
+        valid = out.dropna(subset=["dataHoraCotacao", "cotacaoVenda"])
+        if len(valid) < len(out):
+            print(f"Aviso: {len(out) - len(valid)} registros PTAX sem data/hora ou cotação de venda válidas foram descartados.")
+        return valid
+
+    def closing_per_day(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Remove duplicatas e mantém um boletim por dia (o de maior prioridade; empate = o mais recente)."""
+        df = df.drop_duplicates(subset=["dataHoraCotacao", "tipoBoletim"], keep="last")
+        df = df.assign(date=df["dataHoraCotacao"].dt.normalize(), _priority=df["tipoBoletim"].cat.codes)
+        df = df.sort_values(["date", "_priority", "dataHoraCotacao"], kind="stable")
+        return df.drop_duplicates(subset="date", keep="last").drop(columns="_priority")
+
     def clean_and_transform(self) -> pd.DataFrame:
         """
-        Aplica as técnicas de limpeza (tratamento de nulos, tipos)
-        e transformações (criação de colunas de métricas/KPIs).
+        Pipeline PTAX: normaliza os tipos de cada bloco, reduz cada bloco ao
+        boletim de fechamento por dia, combina os blocos (um dia pode cruzar a
+        fronteira entre blocos) e calcula o retorno diário da cotação de venda.
         """
-        df = self.load_to_dataframe()
-        
-        if df.empty:
-            return df
-            
-        # Exemplo de limpeza e transformação (substituir pela lógica real)
-        # 1. Filtragem de dados inválidos
-        # 2. Conversão de tipo de dados (ex: 'data' para datetime)
-        # 3. Criação de nova coluna (ex: Variação Diária)
-        
-        print(f"DataFrame processado com {len(df.columns)} colunas.")
+        daily = [self.closing_per_day(self.normalize(chunk)) for chunk in self.iter_chunks()]
+
+        if not daily:
+            print("Nenhum dado bruto para carregar.")
+            self.df = pd.DataFrame()
+            return self.df
+
+        df = self.closing_per_day(pd.concat(daily, ignore_index=True))
+        df = df[["date", "dataHoraCotacao", "tipoBoletim"] + PRICE_COLUMNS].reset_index(drop=True)
+        df["retorno"] = df["cotacaoVenda"].pct_change().astype("float32")
+
+        self.df = df
+        print(f"DataFrame processado com {len(df)} dias e {len(df.columns)} colunas.")
         return df
 
     def get_kpis(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calcula as métricas chave (KPIs) para exibição no dashboard."""
-        # Esta função será implementada na fase de Análise
-        return {"total_registros": len(df), "ultima_atualizacao": "N/A"}
+        if df.empty or "date" not in df.columns:
+            return {"total_registros": len(df), "ultima_atualizacao": "N/A"}
+        return {"total_registros": len(df), "ultima_atualizacao": df["date"].iloc[-1].strftime("%d/%m/%Y")}
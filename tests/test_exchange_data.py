@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import api_client
+from utils.frames import frame_columns
+from utils.helpers import calculate_metrics
+
+
+def fake_history(currency, days):
+    """Histórico diário sintético: cada moeda publica num horário diferente, como na AwesomeAPI"""
+    if currency == "BRL":
+        dates = pd.date_range(end=pd.Timestamp.now(), periods=days + 1, freq="D")
+        return pd.DataFrame({"date": dates, "BRL": 1.0})
+    hour = {"USD": 17, "EUR": 18, "GBP": 19}[currency]
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days) + pd.Timedelta(hours=hour)
+    rng = np.random.default_rng(sum(map(ord, currency)))
+    return pd.DataFrame({"date": dates, currency: 5.0 + rng.normal(0, 0.05, days).cumsum()})
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(api_client, "fetch_from_awesome", fake_history)
+
+
+@pytest.mark.parametrize("period", ["7 dias", "30 dias", "90 dias"])
+@pytest.mark.parametrize("currencies", [["USD", "EUR"], ["USD", "EUR", "BRL"], ["BRL", "GBP"]])
+def test_compact_and_wide_frames_give_the_same_metrics(currencies, period):
+    wide = api_client.get_exchange_data(currencies, period, compact=False)
+    compact = api_client.get_exchange_data(currencies, period, compact=True)
+
+    assert len(wide) == len(compact)
+    assert list(wide["date"]) == list(compact.index)
+    assert frame_columns(wide) == frame_columns(compact) == currencies
+
+    wide_metrics = calculate_metrics(wide, currencies)
+    compact_metrics = calculate_metrics(compact, currencies)
+    assert wide_metrics.keys() == compact_metrics.keys()
+    # o formato compacto guarda float32: variações (em %) diferem só no ruído de representação
+    for currency, metrics in wide_metrics.items():
+        for name, value in metrics.items():
+            assert compact_metrics[currency][name] == pytest.approx(value, rel=1e-5, abs=1e-4), (currency, name)
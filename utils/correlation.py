@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Número mínimo de observações para exibir uma correlação
+MIN_CORRELATION_ROWS = 10
+
+
+class StreamingCorrelation:
+    """
+    Matriz de correlação mantida por estatísticas suficientes: contagem,
+    soma por moeda e matriz de produtos cruzados. Cada nova observação
+    custa O(k²) (k moedas), independente do tamanho do histórico.
+
+    - `window`: janela móvel em observações (None = todo o histórico);
+    - `use_returns`: correlaciona retornos diários em vez de níveis de preço.
+
+    As linhas recebidas podem ter NaN: o valor anterior da moeda é repetido
+    (como o ffill do alinhamento); linhas ainda incompletas são ignoradas.
+    """
+
+    def __init__(self, columns, window=None, use_returns=False, max_history=3650):
+        self.columns = list(columns)
+        self.window = window
+        self.use_returns = use_returns
+        k = len(self.columns)
+        self.n = 0
+        self.sums = np.zeros(k)
+        self.cross = np.zeros((k, k))
+        self.shift = None            # primeira observação: centraliza os dados (estabilidade numérica)
+        self.observations = deque()  # observações dentro da janela
+        self.last_day = None
+        self.last_level = np.full(k, np.nan)
+        self.prev_level = np.full(k, np.nan)
+        self.last_added = False      # a última linha gerou uma observação?
+        self.history = deque(maxlen=max_history)   # (dia, matriz de correlação ou None)
+        self._lock = threading.Lock()
+
+    def update(self, days, block):
+        """Processa as linhas (um dia por linha, em ordem) posteriores ao último dia visto"""
+        days = pd.DatetimeIndex(days).normalize()
+        block = np.asarray(block, dtype=float)
+
+        with self._lock:
+            start = 0 if self.last_day is None else days.searchsorted(self.last_day)
+            applied = 0
+            for day, row in zip(days[start:], block[start:]):
+                if self.last_day is not None and day < self.last_day:
+                    continue
+                if day == self.last_day:
+                    self._revise(row)
+                else:
+                    self._append(day, row)
+                applied += 1
+            return applied
+
+    def _observation(self, level, previous):
+        obs = level / previous - 1 if self.use_returns else level
+        return obs if not np.isnan(obs).any() else None
+
+    def _add(self, obs, sign):
+        if self.shift is None:
+            self.shift = obs.copy()
+        centered = obs - self.shift
+        self.n += sign
+        self.sums += sign * centered
+        self.cross += sign * np.outer(centered, centered)
+
+    def _append(self, day, row):
+        level = np.where(np.isnan(row), self.last_level, row)
+        obs = self._observation(level, self.last_level)
+
+        self.prev_level, self.last_level = self.last_level, level
+        self.last_day = day
+        self.last_added = obs is not None
+
+        if obs is not None:
+            self._add(obs, +1)
+            self.observations.append(obs)
+            if self.window is not None and len(self.observations) > self.window:
+                self._add(self.observations.popleft(), -1)
+
+        self.history.append((day, self._matrix()))
+
+    def _revise(self, row):
+        """Substitui a última linha (nova cotação do mesmo dia)"""
+        level = np.where(np.isnan(row), self.last_level, row)
+        if self.last_added:
+            self._add(self.observations.pop(), -1)
+
+        obs = self._observation(level, self.prev_level)
+        self.last_level = level
+        self.last_added = obs is not None
+        if obs is not None:
+            self._add(obs, +1)
+            self.observations.append(obs)
+            if self.window is not None and len(self.observations) > self.window:
+                self._add(self.observations.popleft(), -1)
+
+        if self.history:
+            self.history[-1] = (self.last_day, self._matrix())
+
+    def _matrix(self):
+        if self.n < MIN_CORRELATION_ROWS:
+            return None
+        mean = self.sums / self.n
+        cov = (self.cross - self.n * np.outer(mean, mean)) / (self.n - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def matrix(self):
+        """Matriz de correlação atual (DataFrame) ou None se houver poucas observações"""
+        with self._lock:
+            corr = self._matrix()
+        if corr is None:
+            return None
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def pair_series(self, a, b):
+        """Série temporal da correlação entre duas moedas (date, correlation)"""
+        i, j = self.columns.index(a), self.columns.index(b)
+        with self._lock:
+            rows = [(day, corr[i, j] if corr is not None else np.nan) for day, corr in self.history]
+        return pd.DataFrame(rows, columns=["date", "correlation"])
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+def cross_rate_block(block):
+    """
+    Todas as taxas cruzadas de um bloco cotado em BRL (datas x moedas) em um
+    único passo vetorizado: resultado[t, i, j] = preço de 1 unidade da moeda
+    i na moeda j (= BRL por i / BRL por j).
+    """
+    block = np.asarray(block, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross = block[:, :, None] / block[:, None, :]
+    cross[~np.isfinite(cross)] = np.nan
+    return cross
+
+
+def cross_rate_matrix(rates):
+    """Matriz N x N (linha = base, coluna = cotada) a partir de cotações em BRL {moeda: valor}"""
+    columns = [c for c, v in rates.items() if v is not None]
+    values = np.array([[rates[c] for c in columns]], dtype=float)
+    return pd.DataFrame(cross_rate_block(values)[0], index=columns, columns=columns)
+
+
+def cross_rate_history(dates, block, columns):
+    """Histórico N x N: date + uma coluna "<base>/<cotada>" por par ordenado de moedas distintas"""
+    cross = cross_rate_block(block)
+    data = {"date": np.asarray(dates)}
+    for i, base in enumerate(columns):
+        for j, quote in enumerate(columns):
+            if i != j:
+                data[f"{base}/{quote}"] = cross[:, i, j]
+    return pd.DataFrame(data)
+
+
+def cross_rate_change_matrix(block, columns):
+    """Variação (%) de cada taxa cruzada entre o primeiro e o último dia com todas as moedas cotadas"""
+    block = np.asarray(block, dtype=float)
+    complete = block[~np.isnan(block).any(axis=1)]
+    if len(complete) < 2:
+        return pd.DataFrame(index=columns, columns=columns, dtype=float)
+    first, last = cross_rate_block(complete[[0, -1]])
+    return pd.DataFrame((last / first - 1) * 100, index=columns, columns=columns)
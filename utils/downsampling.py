@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: escolhe `n_out` pontos que preservam
+    a forma visual da série. Retorna os índices selecionados (sempre
+    inclui o primeiro e o último ponto).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # limites dos baldes internos (o primeiro e o último ponto ficam fixos)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # média do próximo balde (ou o último ponto, no último balde)
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # ponto do balde atual que forma o maior triângulo com `a` e a média seguinte
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Min-max por balde: mantém o mínimo e o máximo de cada balde
+    (n_out/2 baldes), preservando picos e vales. Retorna índices ordenados.
+    """
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    size = int(np.ceil(n / buckets))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    valid = ~np.isnan(padded).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    lows = offsets + np.nanargmin(padded[valid], axis=1)
+    highs = offsets + np.nanargmax(padded[valid], axis=1)
+
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample(x, y, max_points, method="lttb"):
+    """Reduz (x, y) a no máximo ~`max_points` pontos com LTTB ou min-max"""
+    if len(y) <= max_points:
+        return x, y
+
+    if method == "minmax":
+        idx = minmax_indices(y, max_points)
+    else:
+        x_num = np.asarray(x, dtype="datetime64[ns]").astype("int64") if np.issubdtype(np.asarray(x).dtype, np.datetime64) else x
+        idx = lttb_indices(x_num, y, max_points)
+
+    return np.asarray(x)[idx], np.asarray(y)[idx]
@@ -0,0 +1,71 @@
+import io
+import json
+import zipfile
+
+from utils.frames import expand_frame
+from utils.memo import Memo, fingerprint
+
+# Linhas por bloco ao gravar o CSV dentro do ZIP
+CSV_CHUNK_ROWS = 50_000
+
+# Formatos de exportação: rótulo -> (extensão, mime)
+EXPORT_FORMATS = {
+    "ZIP (CSV + JSON)": ("zip", "application/zip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow (Feather)": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Arquivos já gerados, por formato + fingerprint dos dados
+export_memo = Memo(max_bytes=128 * 1024 * 1024, name="exports")
+
+
+def export_key(fmt, df_data, metrics_data):
+    """Chave do arquivo exportado: muda apenas quando os dados mudam"""
+    return (fmt, fingerprint(df_data, metrics_data))
+
+
+def get_export(fmt, df_data, metrics_data):
+    """Retorna os bytes do arquivo no formato pedido, gerando-o só se necessário"""
+    builders = {
+        "zip": lambda: build_zip(df_data, metrics_data),
+        "parquet": lambda: build_parquet(df_data),
+        "arrow": lambda: build_arrow(df_data),
+    }
+    return export_memo.get_or_build(
+        export_key(fmt, df_data, metrics_data),
+        builders[fmt],
+        sizeof=len
+    )
+
+
+def write_csv_chunks(df, stream, chunk_rows=CSV_CHUNK_ROWS):
+    """Grava o DataFrame como CSV em blocos, sem montar o texto inteiro em memória"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        stream.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+
+
+def build_zip(df_data, metrics_data):
+    """ZIP com o histórico (CSV, gravado em blocos) e as métricas (JSON)"""
+    df_data = expand_frame(df_data)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        with zip_file.open("historico_cotacoes.csv", "w") as stream:
+            write_csv_chunks(df_data, stream)
+        # Salva o JSON com caracteres especiais (UTF-8)
+        zip_file.writestr("metricas_analise.json", json.dumps(metrics_data, indent=4, ensure_ascii=False))
+    return buffer.getvalue()
+
+
+def build_parquet(df_data):
+    """Histórico em Parquet (colunar, compressão zstd)"""
+    buffer = io.BytesIO()
+    expand_frame(df_data).to_parquet(buffer, index=False, compression="zstd")
+    return buffer.getvalue()
+
+
+def build_arrow(df_data):
+    """Histórico em Arrow IPC / Feather v2 (compressão zstd)"""
+    buffer = io.BytesIO()
+    expand_frame(df_data).reset_index(drop=True).to_feather(buffer, compression="zstd")
+    return buffer.getvalue()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Tipo dos valores no formato compacto
+COMPACT_DTYPE = np.float32
+
+# Moedas representadas por uma constante (sem coluna materializada)
+CONSTANT_COLUMNS = {"BRL": 1.0}
+
+
+def compact_frame(dates, block, columns, constants=None, order=None):
+    """
+    Formato compacto do bloco alinhado: índice DatetimeIndex ("date"),
+    valores float32 num único buffer somente leitura (compartilhável entre
+    sessões sem cópia) e moedas constantes guardadas em `attrs["constants"]`
+    em vez de uma coluna.
+    """
+    values = np.ascontiguousarray(block, dtype=COMPACT_DTYPE)
+    values.flags.writeable = False
+    df = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name="date"), columns=list(columns), copy=False)
+    df.attrs["constants"] = dict(constants or {})
+    df.attrs["order"] = list(order) if order is not None else list(columns) + list(df.attrs["constants"])
+    return df
+
+
+def is_compact(df):
+    """True se o DataFrame usa o formato compacto (datas no índice)"""
+    return "date" not in df.columns and isinstance(df.index, pd.DatetimeIndex)
+
+
+def frame_constants(df):
+    return df.attrs.get("constants", {}) if is_compact(df) else {}
+
+
+def frame_columns(df):
+    """Moedas presentes no DataFrame (colunas + constantes virtuais), na ordem original"""
+    if not is_compact(df):
+        return [c for c in df.columns if c != "date"]
+    present = set(df.columns) | set(frame_constants(df))
+    return [c for c in df.attrs.get("order", []) if c in present]
+
+
+def date_values(df):
+    """Datas do DataFrame, em qualquer um dos dois formatos"""
+    return pd.Series(df.index) if is_compact(df) else df["date"].reset_index(drop=True)
+
+
+def column_values(df, column):
+    """Valores de uma moeda; constantes viram um array somente leitura sem cópia"""
+    constants = frame_constants(df)
+    if column in constants:
+        return np.broadcast_to(COMPACT_DTYPE(constants[column]), (len(df),))
+    return df[column].to_numpy()
+
+
+def frame_block(df, columns):
+    """Bloco float64 (datas x moedas) com as colunas pedidas, incluindo constantes"""
+    constants = frame_constants(df)
+    quoted = [c for c in columns if c not in constants]
+
+    frame = df[quoted]
+    if not all(pd.api.types.is_numeric_dtype(t) for t in frame.dtypes):
+        frame = frame.apply(pd.to_numeric, errors="coerce")
+    if not constants:
+        return frame.to_numpy(dtype=float)
+
+    block = np.empty((len(df), len(columns)))
+    positions = [j for j, c in enumerate(columns) if c not in constants]
+    block[:, positions] = frame.to_numpy(dtype=float)
+    for j, c in enumerate(columns):
+        if c in constants:
+            block[:, j] = constants[c]
+    return block
+
+
+def expand_frame(df, dtype=None):
+    """
+    Formato largo (coluna "date" + uma coluna por moeda), materializando as
+    constantes. Formatos largos são devolvidos sem alteração.
+    """
+    if not is_compact(df):
+        return df
+    wide = pd.DataFrame({c: column_values(df, c) for c in frame_columns(df)}, index=pd.RangeIndex(len(df)))
+    if dtype is not None:
+        wide = wide.astype(dtype)
+    wide.insert(0, "date", df.index.to_numpy())
+    return wide
+
+
+def frame_nbytes(df):
+    """Bytes ocupados pelo DataFrame (índice + valores)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -1,51 +1,69 @@
+import warnings
 import pandas as pd
 import numpy as np
+from utils.frames import frame_block, frame_columns
 
-def calculate_metrics(df, currencies):
-    metrics = {}
+# Janelas (em registros) das variações percentuais calculadas
+CHANGE_WINDOWS = (7, 30, 90)
 
-    for currency in currencies:
-        if currency not in df.columns:
-            continue
 
-        values = pd.to_numeric(df[currency], errors='coerce').dropna()
+def calculate_metrics(df, currencies):
+    """
+    Calcula as métricas de todas as moedas de uma vez, sobre o bloco 2-D
+    (datas x moedas): variações de 7/30/90 registros, volatilidade anualizada
+    e número de pontos. Valores ausentes de cada coluna são ignorados, como
+    no cálculo moeda a moeda.
+    """
+    present = set(frame_columns(df))
+    cols = [c for c in currencies if c in present]
+    if not cols or len(df) == 0:
+        return {}
+
+    # aceita o formato largo e o compacto (float32, BRL virtual)
+    block = frame_block(df, cols)
+    valid = ~np.isnan(block)
+
+    # empurra os valores válidos de cada coluna para o topo (ordem preservada)
+    if not valid.all():
+        order = np.argsort(~valid, axis=0, kind='stable')
+        block = np.take_along_axis(block, order, axis=0)
+    counts = valid.sum(axis=0)
+
+    col_idx = np.arange(len(cols))
+    last = block[np.maximum(counts - 1, 0), col_idx]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = {}
+        for days in CHANGE_WINDOWS:
+            past = block[np.clip(counts - 1 - days, 0, None), col_idx]
+            changes[days] = np.where(counts > days, (last - past) / past * 100, 0.0)
+
+        # retornos diários de todas as colunas; posições além do fim de cada coluna viram NaN
+        returns = block[1:] / block[:-1] - 1
+        returns[np.arange(1, block.shape[0])[:, None] >= counts] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(252) * 100
 
-        if len(values) == 0:
-            continue
+    metrics = {}
 
-        current_value = values.iloc[-1]
+    for j, currency in enumerate(cols):
+        if counts[j] == 0:
+            continue
 
         metrics[currency] = {
-            "current_value": float(current_value),
-            "change_7d": calculate_percentage_change(values, 7),
-            "change_30d": calculate_percentage_change(values, 30),
-            "change_90d": calculate_percentage_change(values, 90),
-            "volatility": calculate_volatility(values),
-            "data_points": len(values)
+            "current_value": float(last[j]),
+            "change_7d": float(changes[7][j]),
+            "change_30d": float(changes[30][j]),
+            "change_90d": float(changes[90][j]),
+            "volatility": float(volatility[j]),
+            "data_points": int(counts[j])
         }
 
     return metrics
 
 
-def calculate_percentage_change(values, days):
-    if len(values) <= days:
-        return 0.0
-    try:
-        past = values.iloc[-(days+1)]
-        current = values.iloc[-1]
-        return float(((current - past) / past) * 100)
-    except:
-        return 0.0
-
-
-def calculate_volatility(values):
-    try:
-        returns = values.pct_change().dropna()
-        return float(returns.std() * np.sqrt(252) * 100)
-    except:
-        return 0.0
-
-
 def format_currency_value(value, currency="BRL"):
     if value is None or pd.isna(value):
         return "R$ --.--"
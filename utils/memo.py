@@ -0,0 +1,106 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils import perf
+
+
+def _update_with_array(h, values):
+    """Alimenta o hash com o buffer de um array (ou hash por linha para objetos)"""
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = pd.util.hash_array(values.astype(str))
+    h.update(str(values.dtype).encode())
+    h.update(np.ascontiguousarray(values).view(np.uint8).tobytes())
+
+
+def fingerprint(*parts):
+    """
+    Impressão digital (blake2b) do conteúdo: DataFrames e Series são
+    hasheados direto dos buffers de cada coluna (sem serializar para texto);
+    dicts, listas e escalares entram pela representação JSON.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            h.update(b"df")
+            h.update(json.dumps([str(c) for c in part.columns]).encode())
+            _update_with_array(h, part.index.to_numpy())
+            for col in part.columns:
+                _update_with_array(h, part[col].to_numpy())
+        elif isinstance(part, pd.Series):
+            h.update(b"series")
+            _update_with_array(h, part.index.to_numpy())
+            _update_with_array(h, part.to_numpy())
+        elif isinstance(part, np.ndarray):
+            h.update(b"array")
+            _update_with_array(h, part)
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class Memo:
+    """
+    Cache LRU limitado por memória (bytes estimados) para objetos caros de
+    construir, como figuras Plotly e tabelas, indexados pelo fingerprint dos
+    dados de entrada.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, name="memo"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.total_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder, sizeof=None):
+        """Retorna o objeto da chave ou o constrói com `builder()` e o guarda"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+                perf.cache_event(self.name, hit=True)
+                return item[0]
+
+        perf.cache_event(self.name, hit=False)
+        with perf.stage(f"{self.name}_build"):
+            value = builder()
+        size = sizeof(value) if sizeof is not None else estimate_size(value)
+
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._data) > 1:
+                _, (_, old_size) = self._data.popitem(last=False)
+                self.total_bytes -= old_size
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+
+def estimate_size(value):
+    """Tamanho aproximado em bytes de figuras, DataFrames e listas"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if hasattr(value, "to_plotly_json"):
+        return sum(
+            np.asarray(v).nbytes
+            for trace in value.data
+            for v in trace.to_plotly_json().values()
+            if isinstance(v, (np.ndarray, list, tuple))
+        ) + 1024
+    return len(json.dumps(value, default=str))
+
+
+# Memo compartilhado pelos componentes visuais
+figure_memo = Memo(name="figures")
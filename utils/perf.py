@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Onde os snapshots das métricas são gravados (JSON + texto Prometheus, p/ textfile collector)
+METRICS_DIR = os.environ.get("DASHBOARD_METRICS_DIR", "data/processed")
+METRICS_WRITE_INTERVAL = 10.0   # segundos entre gravações
+
+_stages = {}        # etapa -> {"count", "total", "max", "last"}
+_caches = {}        # cache -> {"hits", "misses"}
+_errors = {}        # etapa -> número de falhas
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_local = threading.local()
+_last_write = 0.0
+
+
+def record(name, seconds):
+    """Registra uma duração para a etapa `name` (e na execução corrente da thread, se houver)"""
+    with _lock:
+        stats = _stages.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["last"] = seconds
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.append((name, seconds))
+
+
+@contextmanager
+def stage(name):
+    """Cronometra o bloco como a etapa `name` (exceções também contam como falha da etapa)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        error(name)
+        raise
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def cache_event(cache, hit):
+    """Conta um acerto (hit) ou falta (miss) do cache `cache`"""
+    with _lock:
+        counters = _caches.setdefault(cache, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+
+def error(name):
+    """Conta uma falha na etapa `name`"""
+    with _lock:
+        _errors[name] = _errors.get(name, 0) + 1
+
+
+def start_run():
+    """Passa a guardar as etapas desta thread (uma execução do script)"""
+    _local.run = []
+
+
+def end_run():
+    """Etapas registradas desde start_run, na ordem: [(nome, segundos)]"""
+    run = getattr(_local, "run", None) or []
+    _local.run = None
+    return run
+
+
+def snapshot(extra_http=None):
+    """Cópia de todas as métricas (etapas, caches, falhas e, opcionalmente, requisições HTTP por host)"""
+    with _lock:
+        data = {
+            "stages": {name: dict(stats) for name, stats in _stages.items()},
+            "caches": {name: dict(counters) for name, counters in _caches.items()},
+            "errors": dict(_errors),
+        }
+    data["http"] = extra_http or {}
+    return data
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_json(data):
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def to_prometheus(data):
+    """Formato de texto do Prometheus"""
+    lines = [
+        "# HELP dashboard_stage_seconds Duração das etapas do dashboard.",
+        "# TYPE dashboard_stage_seconds summary",
+    ]
+    for name, stats in sorted(data["stages"].items()):
+        lines.append(f'dashboard_stage_seconds_count{{stage="{_label(name)}"}} {stats["count"]}')
+        lines.append(f'dashboard_stage_seconds_sum{{stage="{_label(name)}"}} {stats["total"]:.6f}')
+
+    lines += [
+        "# HELP dashboard_cache_requests_total Leituras de cache por resultado.",
+        "# TYPE dashboard_cache_requests_total counter",
+    ]
+    for name, counters in sorted(data["caches"].items()):
+        for key, result in (("hits", "hit"), ("misses", "miss")):
+            lines.append(f'dashboard_cache_requests_total{{cache="{_label(name)}",result="{result}"}} {counters[key]}')
+
+    lines += [
+        "# HELP dashboard_errors_total Falhas por etapa.",
+        "# TYPE dashboard_errors_total counter",
+    ]
+    for name, total in sorted(data["errors"].items()):
+        lines.append(f'dashboard_errors_total{{stage="{_label(name)}"}} {total}')
+
+    # contadores de src.api.resilience, por host (cada tentativa conta como uma requisição)
+    http = sorted(data["http"].items())
+
+    def family(name, kind, help_text, rows):
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+        lines.extend(f"{name}{labels} {value}" for labels, value in rows)
+
+    family("dashboard_http_requests_total", "counter", "Requisições HTTP enviadas (tentativas), por host.",
+           [(f'{{host="{_label(h)}"}}', c["requests"]) for h, c in http if "requests" in c])
+    family("dashboard_http_responses_total", "counter", "Tentativas HTTP por host e resultado.",
+           [(f'{{host="{_label(h)}",result="{result}"}}', c[key]) for h, c in http
+            for key, result in (("successes", "success"), ("failures", "failure")) if key in c])
+    family("dashboard_http_retries_total", "counter", "Novas tentativas após falha, por host.",
+           [(f'{{host="{_label(h)}"}}', c["retries"]) for h, c in http if "retries" in c])
+    family("dashboard_http_short_circuits_total", "counter", "Chamadas recusadas pelo circuito aberto, por host.",
+           [(f'{{host="{_label(h)}"}}', c["short_circuits"]) for h, c in http if "short_circuits" in c])
+    family("dashboard_http_request_seconds", "summary", "Duração das tentativas HTTP, por host.",
+           [row for h, c in http if "seconds" in c for row in (
+               (f'_count{{host="{_label(h)}"}}', c.get("requests", 0)),
+               (f'_sum{{host="{_label(h)}"}}', f'{c["seconds"]:.6f}'),
+           )])
+    family("dashboard_http_circuit_open", "gauge", "1 se o circuito do host está aberto (ou meio aberto).",
+           [(f'{{host="{_label(h)}"}}', int(c["circuit"] != "closed")) for h, c in http if "circuit" in c])
+
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(data, directory=METRICS_DIR, force=False):
+    """Grava metrics.json e metrics.prom (escrita atômica), no máximo a cada METRICS_WRITE_INTERVAL"""
+    global _last_write
+    now = time.monotonic()
+    with _lock:
+        if not force and now - _last_write < METRICS_WRITE_INTERVAL:
+            return False
+        _last_write = now
+
+    os.makedirs(directory, exist_ok=True)
+    # uma gravação por vez; cada arquivo temporário é único (vários processos podem gravar no mesmo diretório)
+    with _write_lock:
+        for filename, content in (("metrics.json", to_json(data)), ("metrics.prom", to_prometheus(data))):
+            path = os.path.join(directory, filename)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=filename + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+    return True
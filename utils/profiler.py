@@ -0,0 +1,159 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Liga o perfilador: variável de ambiente (valor = modo) ou ?profile=<modo> na URL
+PROFILE_ENV = "DASHBOARD_PROFILE"
+PROFILE_PARAM = "profile"
+
+# "cprofile": determinístico, grava .pstats | "sample": amostragem, grava pilhas colapsadas (flamegraph.pl / speedscope)
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_MODE = "cprofile"
+
+PROFILE_DIR = "data/processed"
+MAX_PROFILES = 20           # perfis mantidos no diretório (os mais antigos são apagados)
+SAMPLE_INTERVAL = 0.005     # segundos entre amostras
+TOP_N = 15
+
+
+def profile_mode(value):
+    """Modo pedido pelo valor da variável/parâmetro (None se desligado)"""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if value in ("", "0", "false", "off", "no"):
+        return None
+    return value if value in PROFILE_MODES else DEFAULT_MODE
+
+
+def _output_path(directory, suffix):
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"profile_{datetime.now():%Y%m%d_%H%M%S_%f}.{suffix}")
+
+
+def _prune(directory, keep=MAX_PROFILES):
+    """Apaga os perfis mais antigos, mantendo os `keep` mais recentes (o nome traz o horário)"""
+    profiles = sorted(name for name in os.listdir(directory) if name.startswith("profile_"))
+    for name in profiles[:-keep]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass    # outro processo já apagou
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class CProfileRun:
+    """Perfil determinístico (cProfile) da thread que chamou `start`"""
+
+    mode = "cprofile"
+
+    def __init__(self, directory=PROFILE_DIR, top_n=TOP_N):
+        self.directory = directory
+        self.top_n = top_n
+        self._profile = cProfile.Profile()
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def stop(self):
+        """Encerra, grava o .pstats e retorna o resumo dos pontos quentes"""
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        path = _output_path(self.directory, "pstats")
+        self._profile.dump_stats(path)
+        _prune(self.directory)
+
+        stats = pstats.Stats(self._profile)
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": calls,
+                "self_s": own,
+                "cumulative_s": cumulative,
+            })
+        rows.sort(key=lambda r: r["self_s"], reverse=True)
+        return {"mode": self.mode, "path": path, "elapsed": elapsed, "top": rows[:self.top_n]}
+
+
+class SampledRun:
+    """
+    Perfil por amostragem: uma thread lê a pilha da thread alvo a cada
+    `interval` segundos e conta as pilhas no formato colapsado
+    ("a;b;c N"), pronto para flamegraph.pl ou speedscope.
+    """
+
+    mode = "sample"
+
+    def __init__(self, directory=PROFILE_DIR, top_n=TOP_N, interval=SAMPLE_INTERVAL):
+        self.directory = directory
+        self.top_n = top_n
+        self.interval = interval
+        self.stacks = Counter()
+        self._target = None
+        self._done = threading.Event()
+        self._thread = None
+        self._started = 0.0
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def stop(self):
+        """Encerra a amostragem, grava as pilhas colapsadas e retorna o resumo"""
+        self._done.set()
+        self._thread.join()
+        elapsed = time.perf_counter() - self._started
+        path = _output_path(self.directory, "collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(f"{stack} {samples}\n")
+        _prune(self.directory)
+
+        # self = amostras em que a função está no topo; inclusivo = em qualquer nível da pilha
+        own, inclusive = Counter(), Counter()
+        for stack, samples in self.stacks.items():
+            labels = stack.split(";")
+            own[labels[-1]] += samples
+            for label in set(labels):
+                inclusive[label] += samples
+
+        total = sum(self.stacks.values()) or 1
+        rows = [{
+            "function": label,
+            "samples": samples,
+            "self_s": samples / total * elapsed,
+            "cumulative_s": inclusive[label] / total * elapsed,
+        } for label, samples in own.most_common(self.top_n)]
+        return {"mode": self.mode, "path": path, "elapsed": elapsed, "samples": total, "top": rows}
+
+
+def start_profiler(mode, directory=PROFILE_DIR):
+    """Inicia o perfil da thread atual no modo pedido"""
+    run = SampledRun(directory) if mode == "sample" else CProfileRun(directory)
+    return run.start()
@@ -0,0 +1,293 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Fator de anualização da volatilidade (dias úteis)
+TRADING_DAYS = 252
+
+# Revisões do dia corrente (a cotação muda ao longo do dia) só são gravadas a cada N segundos
+REVISION_SAVE_INTERVAL = 300
+
+
+class RollingWindowStats:
+    """
+    Estatísticas suficientes de uma janela móvel de uma série de preços:
+    soma dos preços (média móvel), soma e soma dos quadrados dos retornos
+    (volatilidade) e uma fila monotônica com o máximo da janela (drawdown).
+    Cada nova observação custa O(1) (amortizado).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.prices = deque()
+        self.returns = deque()
+        self.price_sum = 0.0
+        self.ret_sum = 0.0
+        self.ret_sumsq = 0.0
+        self.max_queue = deque()   # (posição, preço), preços decrescentes
+        self.position = 0          # total de observações já vistas
+        self.last_price = None
+        self.prev_price = None
+
+    def append(self, price):
+        """Acrescenta uma nova observação"""
+        if self.last_price is not None:
+            r = price / self.last_price - 1
+            self.returns.append(r)
+            self.ret_sum += r
+            self.ret_sumsq += r * r
+            if len(self.returns) > self.window:
+                old = self.returns.popleft()
+                self.ret_sum -= old
+                self.ret_sumsq -= old * old
+
+        self.prev_price, self.last_price = self.last_price, price
+
+        self.prices.append(price)
+        self.price_sum += price
+        if len(self.prices) > self.window:
+            self.price_sum -= self.prices.popleft()
+
+        self.position += 1
+        while self.max_queue and self.max_queue[-1][1] <= price:
+            self.max_queue.pop()
+        self.max_queue.append((self.position, price))
+        while self.max_queue[0][0] <= self.position - self.window:
+            self.max_queue.popleft()
+
+    def revise_last(self, price):
+        """Substitui a última observação (ex.: nova cotação do mesmo dia)"""
+        old = self.prices[-1]
+        self.prices[-1] = price
+        self.price_sum += price - old
+
+        if self.prev_price is not None:
+            old_r = self.returns[-1]
+            new_r = price / self.prev_price - 1
+            self.returns[-1] = new_r
+            self.ret_sum += new_r - old_r
+            self.ret_sumsq += new_r * new_r - old_r * old_r
+
+        self.last_price = price
+
+        # o máximo pode ter mudado: reconstrói a fila a partir da janela atual
+        self.max_queue.clear()
+        start = self.position - len(self.prices) + 1
+        for offset, p in enumerate(self.prices):
+            while self.max_queue and self.max_queue[-1][1] <= p:
+                self.max_queue.pop()
+            self.max_queue.append((start + offset, p))
+
+    def values(self):
+        """(média móvel, volatilidade anualizada %, drawdown %) da janela; NaN até a janela encher"""
+        if len(self.prices) < self.window:
+            return math.nan, math.nan, math.nan
+
+        moving_average = self.price_sum / self.window
+        drawdown = (self.last_price / self.max_queue[0][1] - 1) * 100
+
+        k = len(self.returns)
+        if k < self.window or k < 2:
+            volatility = math.nan
+        else:
+            variance = max((self.ret_sumsq - self.ret_sum * self.ret_sum / k) / (k - 1), 0.0)
+            volatility = math.sqrt(variance) * math.sqrt(TRADING_DAYS) * 100
+
+        return moving_average, volatility, drawdown
+
+    def to_dict(self):
+        return {
+            "window": self.window,
+            "prices": list(self.prices),
+            "returns": list(self.returns),
+            "price_sum": self.price_sum,
+            "ret_sum": self.ret_sum,
+            "ret_sumsq": self.ret_sumsq,
+            "max_queue": [list(item) for item in self.max_queue],
+            "position": self.position,
+            "last_price": self.last_price,
+            "prev_price": self.prev_price,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data["window"])
+        stats.prices = deque(data["prices"])
+        stats.returns = deque(data["returns"])
+        stats.price_sum = data["price_sum"]
+        stats.ret_sum = data["ret_sum"]
+        stats.ret_sumsq = data["ret_sumsq"]
+        stats.max_queue = deque(tuple(item) for item in data["max_queue"])
+        stats.position = data["position"]
+        stats.last_price = data["last_price"]
+        stats.prev_price = data["prev_price"]
+        return stats
+
+
+class RollingEngine:
+    """
+    Mantém, por moeda, as estatísticas móveis de cada janela e a série
+    de resultados (média móvel, volatilidade e drawdown). `update` só
+    processa as observações posteriores à última já vista, e o estado
+    pode ser salvo/carregado em JSON para evitar recomputar após reinícios.
+    """
+
+    def __init__(self, windows=(20, 60), max_history=3650):
+        self.windows = tuple(windows)
+        self.max_history = max_history
+        self._stats = {}        # moeda -> {janela: RollingWindowStats}
+        self._last_date = {}    # moeda -> último instante processado
+        self._history = {}      # moeda -> deque de (data, [ma, vol, dd por janela])
+        self._new_days = 0      # dias novos desde a última gravação
+        self._revisions = 0     # revisões do mesmo dia desde a última gravação
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def update(self, currency, dates, prices):
+        """Processa as observações novas de uma moeda; retorna quantas foram aplicadas"""
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+        prices = pd.to_numeric(pd.Series(prices), errors="coerce").to_numpy(dtype=float)
+
+        with self._lock:
+            stats = self._stats.setdefault(currency, {w: RollingWindowStats(w) for w in self.windows})
+            history = self._history.setdefault(currency, deque(maxlen=self.max_history))
+            last_date = self._last_date.get(currency)
+
+            start = 0 if last_date is None else np.searchsorted(dates, np.datetime64(last_date, "ns"), side="right")
+            applied = 0
+
+            for date, price in zip(dates[start:], prices[start:]):
+                if np.isnan(price):
+                    continue
+                date = pd.Timestamp(date)
+                same_day = last_date is not None and date.normalize() == last_date.normalize()
+
+                for s in stats.values():
+                    if same_day:
+                        s.revise_last(price)
+                    else:
+                        s.append(price)
+
+                row = (date, [v for w in self.windows for v in stats[w].values()])
+                if same_day and history:
+                    history[-1] = row
+                    self._revisions += 1
+                else:
+                    history.append(row)
+                    self._new_days += 1
+
+                last_date = date
+                applied += 1
+
+            if last_date is not None:
+                self._last_date[currency] = last_date
+            return applied
+
+    def first_date(self, currency):
+        """Data do resultado mais antigo guardado da moeda (None se não houver)"""
+        with self._lock:
+            history = self._history.get(currency)
+            return history[0][0] if history else None
+
+    def reset(self, currency):
+        """Descarta o estado da moeda (o próximo `update` recomeça do zero)"""
+        with self._lock:
+            self._stats.pop(currency, None)
+            self._history.pop(currency, None)
+            self._last_date.pop(currency, None)
+            self._new_days += 1     # o estado salvo ficou desatualizado
+
+    def frame(self, currency):
+        """Série de resultados da moeda: date + ma_N, vol_N e dd_N para cada janela N"""
+        columns = [f"{name}_{w}" for w in self.windows for name in ("ma", "vol", "dd")]
+        with self._lock:
+            rows = list(self._history.get(currency, ()))
+        if not rows:
+            return pd.DataFrame(columns=["date"] + columns)
+        df = pd.DataFrame([values for _, values in rows], columns=columns)
+        df.insert(0, "date", [date for date, _ in rows])
+        return df
+
+    def maybe_save(self, filepath, revision_interval=REVISION_SAVE_INTERVAL):
+        """
+        Grava o estado se entrou um dia novo; revisões do dia corrente só são
+        gravadas a cada `revision_interval` segundos. Retorna True se gravou.
+        """
+        with self._lock:
+            due = self._new_days > 0 or (
+                self._revisions > 0 and time.monotonic() - self._saved_at >= revision_interval
+            )
+        if due:
+            self.save(filepath)
+        return due
+
+    def save(self, filepath):
+        """
+        Grava o estado em JSON (escrita atômica): cada gravação usa um arquivo
+        temporário único no mesmo diretório, então sessões e processos
+        concorrentes nunca substituem o arquivo por um escrito pela metade.
+        """
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # uma gravação por vez neste processo: um estado mais antigo nunca sobrescreve um mais novo
+        with self._save_lock:
+            with self._lock:
+                self._new_days = self._revisions = 0
+                self._saved_at = time.monotonic()
+                state = {
+                    "windows": list(self.windows),
+                    "currencies": {
+                        currency: {
+                            "last_date": self._last_date[currency].isoformat(),
+                            "stats": [stats[w].to_dict() for w in self.windows],
+                            "history": [[date.isoformat(), values] for date, values in self._history[currency]],
+                        }
+                        for currency, stats in self._stats.items()
+                        if currency in self._last_date
+                    },
+                }
+
+            fd, tmp = tempfile.mkstemp(dir=directory or ".", prefix=os.path.basename(filepath) + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp, filepath)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    @classmethod
+    def load(cls, filepath, windows=(20, 60), max_history=3650):
+        """Carrega o estado salvo; se não existir (ou as janelas mudaram), começa vazio"""
+        engine = cls(windows, max_history)
+        if not os.path.exists(filepath):
+            return engine
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            print(f"Aviso: estado de {filepath} inválido. Recomputando as janelas móveis.")
+            return engine
+        if tuple(state.get("windows", ())) != engine.windows:
+            return engine
+
+        for currency, data in state["currencies"].items():
+            engine._last_date[currency] = pd.Timestamp(data["last_date"])
+            engine._stats[currency] = {
+                w: RollingWindowStats.from_dict(s) for w, s in zip(engine.windows, data["stats"])
+            }
+            engine._history[currency] = deque(
+                ((pd.Timestamp(date), values) for date, values in data["history"]),
+                maxlen=max_history,
+            )
+        return engine
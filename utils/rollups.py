@@ -0,0 +1,181 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Resoluções disponíveis (frequência pandas) e duração aproximada em dias
+RESOLUTIONS = {"D": 1, "W": 7, "M": 30}
+RESOLUTION_LABELS = {"D": "diária", "W": "semanal", "M": "mensal"}
+
+# Mínimo de pontos no período para uma resolução ainda representar bem a série
+MIN_ROLLUP_POINTS = 100
+
+COLUMNS = ["date", "open", "high", "low", "close", "mean"]
+
+
+def bucket_start(dates, resolution):
+    """Início do balde (semana começando na segunda ou mês) de cada data"""
+    days = pd.DatetimeIndex(dates).normalize()
+    if resolution == "W":
+        return days - pd.to_timedelta(days.dayofweek, unit="D")
+    if resolution == "M":
+        return days - pd.to_timedelta(days.day - 1, unit="D")
+    return days
+
+
+def choose_resolution(span_days, min_points=MIN_ROLLUP_POINTS, min_resolution="D"):
+    """Resolução mais grossa que ainda gera `min_points` pontos no período (nunca mais fina que `min_resolution`)"""
+    order = list(RESOLUTIONS)
+    candidates = order[order.index(min_resolution):]
+    for resolution in reversed(candidates):
+        if span_days / RESOLUTIONS[resolution] >= min_points:
+            return resolution
+    return candidates[0]
+
+
+class _Bucket:
+    """OHLC + soma/contagem de um balde; guarda as cotações diárias só enquanto é o último"""
+
+    __slots__ = ("start", "open", "high", "low", "close", "total", "count", "days")
+
+    def __init__(self, start):
+        self.start = start
+        self.days = []      # (dia, preço) do balde aberto
+
+    def add(self, day, price):
+        if self.days and self.days[-1][0] == day:
+            self.days[-1] = (day, price)      # nova cotação do mesmo dia
+        else:
+            self.days.append((day, price))
+        prices = [p for _, p in self.days]
+        self.open, self.close = prices[0], prices[-1]
+        self.high, self.low = max(prices), min(prices)
+        self.total, self.count = sum(prices), len(prices)
+
+    def freeze(self):
+        self.days = []
+
+    def row(self):
+        return (self.start, self.open, self.high, self.low, self.close, self.total / self.count)
+
+
+class RollupEngine:
+    """
+    Agregados OHLC/média semanais e mensais por moeda, atualizados de forma
+    incremental: `update` só processa os dias posteriores ao último visto
+    (o último dia pode ser revisado) e refaz os baldes anteriores em que
+    chegaram dias que faltavam. Baldes fechados ficam congelados; só o
+    balde aberto guarda os preços diários.
+    """
+
+    def __init__(self, resolutions=("W", "M")):
+        self.resolutions = tuple(resolutions)
+        self._buckets = {}      # (moeda, resolução) -> lista de _Bucket
+        self._first_day = {}    # moeda -> primeiro dia processado
+        self._last_day = {}     # moeda -> último dia processado
+        self._lock = threading.Lock()
+
+    def update(self, currency, dates, prices):
+        """Processa as observações novas de uma moeda; retorna quantas foram aplicadas"""
+        days = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates))).normalize()
+        prices = pd.to_numeric(pd.Series(prices), errors="coerce").to_numpy(dtype=float)
+        valid = ~np.isnan(prices)
+        days, prices = days[valid], prices[valid]
+        if len(days) == 0:
+            return 0
+
+        with self._lock:
+            first = self._first_day.get(currency)
+            if first is not None and days[0] < first:
+                # chegou histórico mais antigo (ex.: backfill): reconstrói a moeda
+                for resolution in self.resolutions:
+                    self._buckets.pop((currency, resolution), None)
+                self._last_day.pop(currency, None)
+                first = None
+
+            last = self._last_day.get(currency)
+            revised = 0 if last is None else self._fill(currency, days, prices, last)
+            start = 0 if last is None else days.searchsorted(last)
+            new_days, new_prices = days[start:], prices[start:]
+            if len(new_days) == 0:
+                return revised
+
+            for resolution in self.resolutions:
+                buckets = self._buckets.setdefault((currency, resolution), [])
+                starts = bucket_start(new_days, resolution)
+                for b_start, day, price in zip(starts, new_days, new_prices):
+                    if not buckets or buckets[-1].start != b_start:
+                        if buckets:
+                            buckets[-1].freeze()
+                        buckets.append(_Bucket(b_start))
+                    buckets[-1].add(day, price)
+
+            if first is None:
+                self._first_day[currency] = new_days[0]
+            self._last_day[currency] = new_days[-1]
+            return revised + len(new_days)
+
+    def _fill(self, currency, days, prices, last):
+        """
+        Refaz os baldes em que chegaram dias que faltavam (ex.: buraco preenchido
+        pelo backfill): o balde é recalculado quando os dados recebidos têm mais
+        dias nele do que os já contados. O primeiro balde dos dados só entra se
+        eles começarem no início do balde (senão podem cobri-lo só em parte).
+        Retorna o número de baldes refeitos. Chamado com o lock.
+        """
+        # inclui o último dia: ele conta no balde aberto (e é reaplicado logo depois)
+        old = days <= last
+        days, prices = days[old], prices[old]
+        if len(days) == 0:
+            return 0
+
+        revised = 0
+        for resolution in self.resolutions:
+            buckets = self._buckets.get((currency, resolution))
+            if not buckets:
+                continue
+            starts = bucket_start(days, resolution)
+            counts = pd.Series(days).groupby(starts).nunique()
+            positions = {b.start: i for i, b in enumerate(buckets)}
+            for b_start, n in counts.items():
+                if b_start == starts[0] and days[0] != b_start:
+                    continue
+                index = positions.get(b_start)
+                current = buckets[index] if index is not None else None
+                if current is not None and current.count >= n:
+                    continue
+                if current is None:
+                    # balde inteiro que faltava (buraco mais longo que o balde)
+                    index = int(np.searchsorted([b.start for b in buckets], b_start))
+
+                bucket = _Bucket(b_start)
+                mask = starts == b_start
+                for day, price in zip(days[mask], prices[mask]):
+                    bucket.add(day, price)
+                if current is None:
+                    buckets.insert(index, bucket)
+                    positions = {b.start: i for i, b in enumerate(buckets)}
+                else:
+                    buckets[index] = bucket
+                if index < len(buckets) - 1:
+                    bucket.freeze()     # só o último balde fica aberto
+                revised += 1
+        return revised
+
+    def frame(self, currency, resolution, start=None):
+        """Agregados da moeda na resolução (date, open, high, low, close, mean), a partir de `start`"""
+        with self._lock:
+            rows = [b.row() for b in self._buckets.get((currency, resolution), ())]
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        if start is not None and not df.empty:
+            df = df[df["date"] >= bucket_start([start], resolution)[0]].reset_index(drop=True)
+        return df
+
+
+def daily_ohlc(dates, prices):
+    """Série diária no mesmo esquema dos agregados (open = high = low = close)"""
+    prices = pd.to_numeric(pd.Series(prices), errors="coerce").to_numpy(dtype=float)
+    return pd.DataFrame({
+        "date": pd.to_datetime(pd.Series(dates)).to_numpy(),
+        "open": prices, "high": prices, "low": prices, "close": prices, "mean": prices,
+    })